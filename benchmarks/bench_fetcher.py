@@ -0,0 +1,269 @@
+"""
+Benchmarks the browser-free HTTP fetcher on recorded Crunchbase pages served by a local stub server
+
+Serves the fixture pages (fixtures/pages.json) over HTTP, with a simulated network latency, and scrapes many public
+profiles through Crunchbase.process_profiles with an HTTPFetcher at each concurrency. Checks every parsed profile
+against the fixture pages parsed without the network, checks that a consumer stopping early stops the requests, with
+and without a scheduler, and prints the profiles per second at each concurrency. Exits with status 1 when a check fails, for CI.
+
+Usage: python benchmarks/bench_fetcher.py [--profiles N] [--latency MS] [--concurrency N ...] [--parser NAME]
+                                          [--json OUT]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code"))
+from crunchbase import Crunchbase
+from fetcher import HTTPFetcher
+from parsing import parse_profile
+from scheduler import Scheduler
+
+__author__ = "Abhinav Thirupathi"
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PROFILE_URL = "https://www.crunchbase.com/organization/acme-robotics"
+
+
+class StubServer:
+    """ Class that represents a local HTTP server serving the recorded pages, every other profile gets the recorded
+    profile page"""
+
+    def __init__(self, latency=0.0):
+        """
+        Initialize and start a stub server on a free port
+        :param latency: Number of seconds every response is delayed by
+        @attribute requests: Number of requests served
+        """
+        with open(os.path.join(FIXTURES, "pages.json"), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        self.pages = dict()
+        for url, file_name in manifest["pages"].items():
+            with open(os.path.join(FIXTURES, file_name), encoding="utf-8") as page_file:
+                self.pages[urlsplit(url).path] = page_file.read().encode("utf-8")
+        self.profile_page = self.pages[urlsplit(PROFILE_URL).path]
+        self.latency = latency
+        self.requests = 0
+        self.__lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                content = stub.serve(self.path)
+                self.send_response(200 if content is not None else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content or b"")))
+                self.end_headers()
+                if content is not None:
+                    try:
+                        self.wfile.write(content)
+                    except ConnectionError:
+                        # The fetcher cancelled the request
+                        pass
+
+            def log_message(self, *arguments):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                # The fetcher resets the connections of the requests it cancels, they aren't errors of the server
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def serve(self, path):
+        """
+        Gets the page served at a path, after the latency, and counts the request
+        :param path: Path of the request
+        :return: HTML content as bytes, or None for a 404
+        """
+        with self.__lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+        if path in self.pages:
+            return self.pages[path]
+        if path.startswith("/organization/") and path.count("/") == 2:
+            return self.profile_page
+        return None
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def reference(stub, parser):
+    """
+    Parses the recorded profile without the network
+    :param stub: StubServer
+    :param parser: BeautifulSoup parser
+    :return: Dictionary with the parsed sections of the profile
+    """
+    tab_paths = ["/organization/acme-robotics", "/organization/acme-robotics/company_financials",
+                 "/organization/acme-robotics/people"]
+    data = parse_profile(url=PROFILE_URL, page=stub.profile_page.decode("utf-8"),
+                         tabs=[stub.pages[path].decode("utf-8") for path in tab_paths], parser=parser)
+    return sections_of(data)
+
+
+def sections_of(data):
+    """
+    Gets the sections of parsed profile data, without its URL
+    :param data: Dictionary of the parsed profile data
+    :return: Dictionary of the sections
+    """
+    profile_data = next(iter(data.values()))
+    return {section: section_data for section, section_data in profile_data.items() if section != "Crunchbase URL"}
+
+
+def profile_urls(count):
+    return [("acme-robotics-{}".format(index), "https://www.crunchbase.com/organization/acme-robotics-{}".format(index))
+            for index in range(count)]
+
+
+def run_scenario(stub, concurrency, profiles, parser, expected):
+    """
+    Scrapes the profiles with a fetcher and measures it
+    :param stub: StubServer
+    :param concurrency: Number of profiles fetched at the same time
+    :param profiles: Number of profiles
+    :param parser: BeautifulSoup parser
+    :param expected: Sections every profile must have
+    :return: Dictionary with the measurements
+    """
+    fetcher = HTTPFetcher(concurrency=concurrency, per_host=concurrency, base_url=stub.url)
+    crunchbase = Crunchbase(parser=parser, fetcher=fetcher)
+    requests = stub.requests
+
+    start = time.perf_counter()
+    results = list(crunchbase.process_profiles(profile_urls(profiles)))
+    seconds = time.perf_counter() - start
+
+    return {
+        "profiles_per_second": len(results) / seconds,
+        "seconds": seconds,
+        "requests": stub.requests - requests,
+        "failed": sum(1 for _, data in results if data is None),
+        "mismatched": sum(1 for _, data in results if data is not None and sections_of(data) != expected),
+    }
+
+
+def check_early_stop(stub, concurrency, parser, scheduler=None):
+    """
+    Stops consuming the profiles after the first one, and checks that the fetcher stops sending requests, and that the
+    scheduler gets back every slot of the cancelled requests
+    :param scheduler: Scheduler of the fetcher, None for no scheduler
+    :return: (passed, detail)
+    """
+    threads = threading.active_count()
+    if scheduler is None:
+        fetcher = HTTPFetcher(concurrency=concurrency, per_host=concurrency, base_url=stub.url)
+    else:
+        fetcher = HTTPFetcher(concurrency=concurrency, per_host=concurrency, base_url=stub.url, scheduler=scheduler)
+    results = Crunchbase(parser=parser, fetcher=fetcher).process_profiles(profile_urls(1000))
+    next(results)
+
+    # Closes in a thread, so a close that hangs fails the check instead of the benchmark
+    start = time.perf_counter()
+    closing = threading.Thread(target=results.close, daemon=True)
+    closing.start()
+    closing.join(timeout=30)
+    seconds = time.perf_counter() - start
+    if closing.is_alive():
+        return False, "still closing after {:.3f} s".format(seconds)
+
+    requests = stub.requests
+    time.sleep(max(0.2, stub.latency * 4))
+    sent = stub.requests - requests
+    detail = "closed in {:.3f} s, {} requests after close, {} threads left".format(
+        seconds, sent, threading.active_count() - threads)
+    passed = sent == 0 and threading.active_count() <= threads
+    if scheduler is not None:
+        leaked = not slots_free(scheduler, scheduler.per_host)
+        detail += ", slots leaked" if leaked else ", no slots leaked"
+        passed = passed and not leaked
+    return passed, detail
+
+
+def slots_free(scheduler, count):
+    """
+    Checks that a number of requests to the profile host can be sent at the same time
+    :param scheduler: Scheduler
+    :param count: Number of requests
+    :return: True if the slots were acquired within 5 seconds
+    """
+    def acquire():
+        for _ in range(count):
+            scheduler.acquire(PROFILE_URL)
+        for _ in range(count):
+            scheduler.release(PROFILE_URL)
+
+    thread = threading.Thread(target=acquire, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    return not thread.is_alive()
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    arguments.add_argument("--profiles", type=int, default=64, help="number of profiles scraped per concurrency")
+    arguments.add_argument("--latency", type=float, default=20, help="simulated latency of every response, in ms")
+    arguments.add_argument("--concurrency", type=int, nargs="*", default=[1, 8, 32],
+                           help="numbers of profiles fetched at the same time")
+    arguments.add_argument("--parser", default=None, help="BeautifulSoup parser ('html.parser', 'lxml', ...)")
+    arguments.add_argument("--json", default=None, help="path of the JSON file the measurements are written to")
+    options = arguments.parse_args()
+
+    stub = StubServer(latency=options.latency / 1000)
+    try:
+        expected = reference(stub, options.parser)
+        results = {concurrency: run_scenario(stub, concurrency, options.profiles, options.parser, expected)
+                   for concurrency in options.concurrency}
+        early_stop = check_early_stop(stub, max(options.concurrency), options.parser)
+        scheduled_stop = check_early_stop(stub, max(options.concurrency), options.parser,
+                                          scheduler=Scheduler(rate=5, burst=2, per_host=2))
+    finally:
+        stub.close()
+
+    failures = list()
+    print("{:>11} {:>14} {:>10} {:>9} {:>7}".format("concurrency", "profiles/s", "requests", "failed", "wrong"))
+    for concurrency, measurements in results.items():
+        print("{:>11} {:>14.1f} {:>10} {:>9} {:>7}".format(concurrency, measurements["profiles_per_second"],
+                                                           measurements["requests"], measurements["failed"],
+                                                           measurements["mismatched"]))
+        if measurements["failed"] > 0 or measurements["mismatched"] > 0:
+            failures.append("concurrency {}: {} failed, {} wrong profiles".format(
+                concurrency, measurements["failed"], measurements["mismatched"]))
+    print("early stop: " + early_stop[1])
+    if not early_stop[0]:
+        failures.append("early stop: " + early_stop[1])
+    print("early stop with a scheduler: " + scheduled_stop[1])
+    if not scheduled_stop[0]:
+        failures.append("early stop with a scheduler: " + scheduled_stop[1])
+
+    if options.json is not None:
+        with open(options.json, "w", encoding="utf-8") as json_file:
+            json.dump({"concurrency": results, "early_stop": early_stop[1],
+                       "early_stop_with_scheduler": scheduled_stop[1]}, json_file, indent=3)
+
+    for failure in failures:
+        print("FAIL " + failure)
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmarks the cold import time of the parse-only entry point and of the scraper
+
+Imports every module in a fresh interpreter, several times, and prints the median import time and the browser and
+network modules it loaded. Exits with status 1 when the parse-only entry point loads selenium (or webdriver_manager),
+or when its median import time is over --budget milliseconds, for CI.
+
+Usage: python benchmarks/bench_import.py [--repeat N] [--budget MS] [--json OUT] [module ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+__author__ = "Abhinav Thirupathi"
+
+CODE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code")
+
+# Module of the parse-only entry point, it must not load the browser modules
+PARSE_ONLY = "parsing"
+MODULES = [PARSE_ONLY, "crunchbase"]
+
+# Modules only a browser (or a network fetcher) needs
+HEAVY_MODULES = ["selenium", "webdriver_manager", "aiohttp"]
+
+# Imports a module in a fresh interpreter and prints the time it took and the heavy modules it loaded
+IMPORT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+__import__(sys.argv[2])
+seconds = time.perf_counter() - start
+print(json.dumps({"ms": seconds * 1000, "loaded": [name for name in sys.argv[3:] if name in sys.modules]}))
+"""
+
+
+def measure(module, repeat):
+    """
+    Imports a module in fresh interpreters
+    :param module: Name of the module in the code directory
+    :param repeat: Number of interpreters started
+    :return: Dictionary with the median 'ms', the 'runs' and the heavy modules 'loaded'
+    """
+    runs = list()
+    loaded = set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, CODE, module] + HEAVY_MODULES,
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        runs.append(result["ms"])
+        loaded.update(result["loaded"])
+    return {"ms": statistics.median(runs), "runs": runs, "loaded": sorted(loaded)}
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    arguments.add_argument("modules", nargs="*", default=MODULES, help="modules to import")
+    arguments.add_argument("--repeat", type=int, default=5, help="number of fresh interpreters per module")
+    arguments.add_argument("--budget", type=float, default=None,
+                           help="maximum median import time of the parse-only entry point, in milliseconds")
+    arguments.add_argument("--json", default=None, help="path of the JSON file the measurements are written to")
+    options = arguments.parse_args()
+
+    results = {module: measure(module, options.repeat) for module in options.modules}
+
+    print("{:<16} {:>14}  {}".format("module", "import (ms)", "loaded"))
+    for module, result in results.items():
+        print("{:<16} {:>14.1f}  {}".format(module, result["ms"], ", ".join(result["loaded"]) or "-"))
+
+    if options.json is not None:
+        with open(options.json, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=3)
+
+    failures = list()
+    if PARSE_ONLY in results:
+        loaded = [name for name in results[PARSE_ONLY]["loaded"] if name in ("selenium", "webdriver_manager")]
+        if len(loaded) > 0:
+            failures.append(PARSE_ONLY + " loads " + ", ".join(loaded))
+        if options.budget is not None and results[PARSE_ONLY]["ms"] > options.budget:
+            failures.append("{} imports in {:.1f} ms (budget {:.1f} ms)".format(PARSE_ONLY, results[PARSE_ONLY]["ms"],
+                                                                                options.budget))
+    for failure in failures:
+        print("REGRESSION " + failure)
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
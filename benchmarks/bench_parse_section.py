@@ -0,0 +1,76 @@
+"""
+Benchmarks Section.parse_section on saved profile page HTML
+
+Compares the single-pass card dispatch against the previous one-find_all-per-card-type dispatch,
+checks that both produce the same output, and prints the time per page for each.
+
+Usage: python benchmarks/bench_parse_section.py [page.html ...]
+"""
+import glob
+import os
+import sys
+import timeit
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code"))
+from section import Section
+
+__author__ = "Abhinav Thirupathi"
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_parse_section(section, section_soup):
+    """
+    Parses the section by walking it once for every card type, like parse_section did before the registry
+    :param section: Section object
+    :param section_soup: Beautiful soup object of the HTML content of the section
+    :return: Dictionary with the parsed data of the section
+    """
+    section_output = {}
+    for card_type, parser in Section.card_parsers.items():
+        for card in section_soup.find_all(card_type):
+            parsed_data = parser(section, card, None, None, False, False)
+            for label, value in parsed_data.items():
+                section_output[label] = value
+    return section_output
+
+
+def parse_page(soup, parse):
+    """
+    Parses every section on the page with the given parse function
+    :param soup: Beautiful soup object of the page
+    :param parse: Function called as parse(section, section_soup)
+    :return: List of the parsed sections
+    """
+    output = []
+    for row_card in soup.find_all("row-card"):
+        section = Section(row_card.find("h2", {"class": "section-title"}).text.strip())
+        output.append(parse(section, row_card.find("section-card")))
+    return output
+
+
+def main(paths, number=50):
+    """
+    Runs the benchmark on the pages
+    :param paths: Paths of the saved HTML pages
+    :param number: Number of times every page is parsed
+    :return:
+    """
+    single_pass = lambda section, section_soup: section.parse_section(section_soup)
+
+    print("{:<30} {:>14} {:>14} {:>9}".format("page", "legacy (ms)", "single (ms)", "speedup"))
+    for path in paths:
+        with open(path, encoding="utf-8") as html_file:
+            soup = BeautifulSoup(html_file.read(), "html.parser")
+
+        if parse_page(soup, legacy_parse_section) != parse_page(soup, single_pass):
+            raise AssertionError("Parsed output differs for " + path)
+
+        legacy = timeit.timeit(lambda: parse_page(soup, legacy_parse_section), number=number) / number * 1000
+        single = timeit.timeit(lambda: parse_page(soup, single_pass), number=number) / number * 1000
+        print("{:<30} {:>14.3f} {:>14.3f} {:>8.2f}x".format(os.path.basename(path), legacy, single, legacy / single))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or sorted(glob.glob(os.path.join(FIXTURES, "*.html"))))
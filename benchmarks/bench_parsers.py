@@ -0,0 +1,89 @@
+"""
+Benchmarks the BeautifulSoup parser backends on saved profile page HTML
+
+Parses every page with each installed backend, with and without the row-card restriction, checks the parsed
+sections against the golden file next to the page (page.json), and prints the time per page for each backend.
+
+Usage: python benchmarks/bench_parsers.py [--update-golden] [page.html ...]
+"""
+import glob
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code"))
+from markup import make_soup, ROW_CARDS, SECTION_CARDS
+from bs4.builder import builder_registry
+from section import Section
+
+__author__ = "Abhinav Thirupathi"
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+BACKENDS = ['html.parser', 'lxml', 'html5lib']
+
+
+def parse_page(page_content, parser, restrict):
+    """
+    Parses every section on the page, the way Profile.parse_profile does for a tab page, or the section-card of a
+    more-results page the way Section.parse_card_more_results does
+    :param page_content: HTML content of the page
+    :param parser: Name of the BeautifulSoup parser
+    :param restrict: If True, only the row-card subtrees are parsed
+    :return: List of [section name, section data] pairs, normalized through JSON
+    """
+    soup = make_soup(page_content, parser, only=ROW_CARDS if restrict else None)
+    output = []
+    for row_card in soup.find_all("row-card"):
+        section_name = row_card.find("h2", {"class": "section-title"}).text.strip()
+        output.append([section_name, Section(section_name).parse_section(row_card.find("section-card"))])
+
+    # More-results pages have no row-card, their first section-card holds all the rows
+    if len(output) == 0:
+        if restrict:
+            soup = make_soup(page_content, parser, only=SECTION_CARDS)
+        section_card = soup.find("section-card")
+        if section_card is not None:
+            output.append(["more-results", Section("more-results").parse_section(section_card, ignore=True)])
+    return json.loads(json.dumps(output))
+
+
+def main(paths, update_golden=False, number=20):
+    """
+    Runs the benchmark on the pages
+    :param paths: Paths of the saved HTML pages
+    :param update_golden: If True, rewrites the golden files with the 'html.parser' output
+    :param number: Number of times every page is parsed
+    :return:
+    """
+    backends = [backend for backend in BACKENDS if builder_registry.lookup(backend) is not None]
+
+    print("{:<30} {:<12} {:>9} {:>14}".format("page", "parser", "restrict", "time (ms)"))
+    for path in paths:
+        with open(path, encoding="utf-8") as html_file:
+            page_content = html_file.read()
+
+        golden_path = os.path.splitext(path)[0] + ".json"
+        if update_golden:
+            with open(golden_path, "w", encoding="utf-8") as golden_file:
+                json.dump(parse_page(page_content, 'html.parser', False), golden_file, indent=3, ensure_ascii=False)
+        with open(golden_path, encoding="utf-8") as golden_file:
+            golden = json.load(golden_file)
+
+        for backend in backends:
+            for restrict in [False, True]:
+                # html5lib builds the whole tree and doesn't support the restriction
+                if restrict and backend == 'html5lib':
+                    continue
+                if parse_page(page_content, backend, restrict) != golden:
+                    raise AssertionError("Parsed output of " + backend + " differs from " + golden_path)
+
+                seconds = timeit.timeit(lambda: parse_page(page_content, backend, restrict), number=number) / number
+                print("{:<30} {:<12} {:>9} {:>14.3f}".format(os.path.basename(path), backend, str(restrict),
+                                                            seconds * 1000))
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--update-golden"]
+    main(arguments or sorted(glob.glob(os.path.join(FIXTURES, "*.html"))), update_golden="--update-golden" in sys.argv)
@@ -0,0 +1,201 @@
+"""
+Checks the pool of drivers on recorded Crunchbase pages served by fake selenium drivers
+
+Scrapes many profiles through Crunchbase.process_profiles(workers=N) with a DriverFactory that starts fake drivers,
+some of them broken, and checks that every profile comes back once (in input order through the parse processes),
+that the profiles of a broken driver are handed to another driver, that a profile failing on every driver comes back
+empty after its retries, that the broken drivers are quit and every healthy one quit or handed back to the factory,
+and that a consumer stopping early stops the workers. Prints every check, and exits with status 1 when a check fails,
+for CI.
+
+Usage: python benchmarks/bench_pool.py [--profiles N] [--workers N] [--broken N] [--processes N]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code"))
+from crunchbase import Crunchbase
+from driver import DriverFactory
+from fake_driver import FakeDriver
+from wait import Wait
+
+__author__ = "Abhinav Thirupathi"
+
+PROFILE_URL = "https://www.crunchbase.com/organization/acme-robotics"
+
+# Profile that isn't recorded, so it fails on every driver
+MISSING_URL = "https://www.crunchbase.com/organization/missing"
+
+
+class PoolDriver(FakeDriver):
+    """ Class that represents a fake driver of the pool, a broken one fails every navigation"""
+
+    def __init__(self, broken=False):
+        """
+        Initialize a fake driver of the pool
+        :param broken: If True, every navigation fails like a crashed browser
+        """
+        super().__init__()
+        self.broken = broken
+
+    def get(self, url):
+        if self.broken:
+            raise ConnectionError("Browser crashed")
+        # The factory blanks the drivers it gets back
+        if url == "about:blank":
+            return
+        super().get(url)
+
+
+class FakeDriverFactory(DriverFactory):
+    """ Class that starts fake drivers, every broken-th one is broken, and records what happens to them"""
+
+    def __init__(self, broken=0):
+        """
+        Initialize a factory of fake drivers
+        :param broken: Every broken-th driver started is broken, 0 for none
+        @attribute drivers: List of the drivers started
+        @attribute released: List of the drivers handed back to the factory
+        """
+        super().__init__()
+        self.broken = broken
+        self.drivers = list()
+        self.released = list()
+        self.__lock = threading.Lock()
+
+    def create(self):
+        with self.__lock:
+            driver = PoolDriver(broken=self.broken > 0 and len(self.drivers) % self.broken == self.broken - 1)
+            self.drivers.append(driver)
+        return driver
+
+    def release(self, driver):
+        with self.__lock:
+            self.released.append(driver)
+        super().release(driver)
+
+
+def profile_urls(count, missing=False):
+    urls = [("acme-robotics-{}".format(index), PROFILE_URL) for index in range(count)]
+    if missing:
+        urls.insert(count // 2, ("missing", MISSING_URL))
+    return urls
+
+
+def scrape(profiles, workers, broken, processes=0):
+    """
+    Scrapes the profiles with a pool of fake drivers
+    :param profiles: Number of recorded profiles, a missing profile is added in the middle
+    :param workers: Number of drivers in the pool
+    :param broken: Every broken-th driver started is broken, 0 for none
+    :param processes: Number of processes parsing the pages, 0 to parse them with the drivers
+    :return: (factory, list of (name, data) tuples)
+    """
+    factory = FakeDriverFactory(broken=broken)
+    crunchbase = Crunchbase(wait=Wait(timeout=1, poll=0, settle=0), driver_factory=factory)
+    results = list(crunchbase.process_profiles(profile_urls(profiles, missing=True), workers=workers, retries=2,
+                                               processes=processes))
+    return factory, results
+
+
+def check_pool(profiles, workers, broken):
+    """
+    Checks that every profile comes back once, the broken drivers' profiles from another driver, the missing profile
+    empty, and that the broken drivers are quit and the healthy ones handed back
+    :return: List of (check, passed, detail) tuples
+    """
+    factory, results = scrape(profiles, workers, broken)
+    names = [name for name, _ in results]
+    expected = [name for name, _ in profile_urls(profiles, missing=True)]
+    broken_drivers = [driver for driver in factory.drivers if driver.broken]
+    healthy = [driver for driver in factory.drivers if not driver.broken]
+    failed = [name for name, data in results if data is None]
+
+    checks = [("every profile once", sorted(names) == sorted(expected),
+               "{} profiles back, {} sent".format(len(set(names)), len(expected))),
+              ("re-queued after a broken driver", len(broken_drivers) > 0 and failed == ["missing"],
+               "{} broken drivers, failed profiles: {}".format(len(broken_drivers), ", ".join(failed) or "none")),
+              ("broken drivers quit", all(driver.counts.get("quit", 0) == 1 for driver in broken_drivers) and
+               not any(driver in factory.released for driver in broken_drivers),
+               "{} quit, none handed back".format(len(broken_drivers)))]
+
+    # The missing profile fails its healthy drivers too, so every healthy driver ends either quit or handed back
+    handed_back = [driver for driver in healthy if driver in factory.released]
+    quit = [driver for driver in healthy if driver.counts.get("quit", 0) > 0]
+    checks.append(("healthy drivers quit or back",
+                   all((driver in handed_back) != (driver in quit) for driver in healthy),
+                   "{} handed back, {} quit after the missing profile, of {}".format(len(handed_back), len(quit),
+                                                                                     len(healthy))))
+    factory.close()
+    return checks
+
+
+def check_ordered(profiles, workers, broken, processes):
+    """
+    Checks that the profiles parsed in separate processes come back in input order, with broken drivers
+    :return: List of (check, passed, detail) tuples
+    """
+    _, results = scrape(profiles, workers, broken, processes=processes)
+    names = [name for name, _ in results]
+    expected = [name for name, _ in profile_urls(profiles, missing=True)]
+    return [("input order with processes", names == expected,
+             "{} profiles back in order".format(sum(1 for name, other in zip(names, expected) if name == other)))]
+
+
+def check_early_stop(workers):
+    """
+    Stops consuming the profiles after the first one, and checks that the workers stop and hand their drivers back
+    :return: List of (check, passed, detail) tuples
+    """
+    threads = threading.active_count()
+    factory = FakeDriverFactory()
+    crunchbase = Crunchbase(wait=Wait(timeout=1, poll=0, settle=0), driver_factory=factory)
+    results = crunchbase.process_profiles(profile_urls(1000), workers=workers)
+    next(results)
+
+    # Closes in a thread, so a close that hangs fails the check instead of the benchmark
+    start = time.perf_counter()
+    closing = threading.Thread(target=results.close, daemon=True)
+    closing.start()
+    closing.join(timeout=30)
+    seconds = time.perf_counter() - start
+    if closing.is_alive():
+        return [("early stop", False, "still closing after {:.3f} s".format(seconds))]
+
+    navigations = sum(driver.counts.get("get", 0) for driver in factory.drivers)
+    time.sleep(0.2)
+    sent = sum(driver.counts.get("get", 0) for driver in factory.drivers) - navigations
+    factory.close()
+    return [("early stop", sent == 0 and threading.active_count() <= threads and
+             len(factory.released) == len(factory.drivers),
+             "closed in {:.3f} s, {} navigations after close, {} threads left, {} of {} drivers handed back".format(
+                 seconds, sent, threading.active_count() - threads, len(factory.released), len(factory.drivers)))]
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    arguments.add_argument("--profiles", type=int, default=16, help="number of profiles scraped")
+    arguments.add_argument("--workers", type=int, default=4, help="number of drivers in the pool")
+    arguments.add_argument("--broken", type=int, default=3,
+                           help="every broken-th driver started is broken, at least 3 so retries reach a healthy one")
+    arguments.add_argument("--processes", type=int, default=2, help="number of processes parsing the pages")
+    options = arguments.parse_args()
+
+    checks = check_pool(options.profiles, options.workers, options.broken) + \
+        check_ordered(options.profiles, options.workers, options.broken, options.processes) + \
+        check_early_stop(options.workers)
+
+    failures = list()
+    for check, passed, detail in checks:
+        print("{:<4} {:<32} {}".format("ok" if passed else "FAIL", check, detail))
+        if not passed:
+            failures.append(check)
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Checks the pacing of the scheduler on a simulated clock, without waiting for it
+
+Sends requests through a Scheduler driven by a SimulatedClock and checks the token bucket rate, the burst, the per-host
+concurrency cap, the priorities, and the exponential backoff: a host is paused after a blocked page, resumes once its
+pause is over, and the rate is halved then raised back after good pages. Prints every check and the simulated time it
+took, and exits with status 1 when a check fails, for CI.
+
+Usage: python benchmarks/bench_scheduler.py [--rate R] [--burst N] [--requests N]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code"))
+from scheduler import Scheduler, SimulatedClock, FRESH, REFRESH
+
+__author__ = "Abhinav Thirupathi"
+
+PROFILE_URL = "https://www.crunchbase.com/organization/acme-robotics"
+OTHER_URL = "https://www.example.com/organization/acme-robotics"
+
+# Simulated times are compared to their expected value with this margin, in seconds
+MARGIN = 1e-6
+
+
+def send(scheduler, url, count, ok=True):
+    """
+    Sends requests one after another
+    :param scheduler: Scheduler
+    :param url: URL of the requests
+    :param count: Number of requests
+    :param ok: Feedback of every request
+    :return: List of the simulated times the requests were sent at
+    """
+    sent = list()
+    for _ in range(count):
+        with scheduler.slot(url) as slot:
+            sent.append(scheduler.clock.time())
+            slot.ok = ok
+    return sent
+
+
+def check_rate(rate, burst, requests):
+    """
+    Checks that the burst is sent at once, then one request every 1 / rate seconds
+    :return: List of (check, passed, detail) tuples
+    """
+    scheduler = Scheduler(rate=rate, burst=burst, per_host=1, increase=0, clock=SimulatedClock())
+    sent = send(scheduler, PROFILE_URL, requests)
+    expected = (requests - burst) / rate
+    return [("burst sent at once", all(moment <= MARGIN for moment in sent[:burst]),
+             "{} requests at t=0".format(burst)),
+            ("token bucket rate", abs(sent[-1] - expected) <= MARGIN,
+             "{} requests in {:.3f} s (expected {:.3f} s)".format(requests, sent[-1], expected))]
+
+
+def check_backoff(rate):
+    """
+    Checks that blocked pages pause the host with a doubling backoff and halve the rate, that the host resumes once its
+    pause is over, that other hosts aren't paused, and that good pages raise the rate back
+    :return: List of (check, passed, detail) tuples
+    """
+    clock = SimulatedClock()
+    scheduler = Scheduler(rate=rate, burst=1, per_host=1, increase=rate / 4, backoff=2.0, max_backoff=8.0, clock=clock)
+    checks = list()
+
+    pauses = list()
+    for _ in range(4):
+        send(scheduler, PROFILE_URL, 1, ok=False)
+        pauses.append(scheduler.paused(PROFILE_URL))
+    checks.append(("exponential backoff", all(abs(pause - expected) <= MARGIN
+                                              for pause, expected in zip(pauses, [2.0, 4.0, 8.0, 8.0])),
+                   "pauses {} s, capped at 8 s".format(", ".join("{:g}".format(pause) for pause in pauses))))
+    checks.append(("rate halved", abs(scheduler.rate - max(scheduler.min_rate, rate / 16)) <= MARGIN,
+                   "{:.3f} requests/s after 4 blocked pages".format(scheduler.rate)))
+
+    # Another host isn't paused, and is only paced by the rate
+    checks.append(("other host not paused", scheduler.paused(OTHER_URL) == 0, "paused 0 s"))
+
+    # The paused host resumes once its pause is over
+    resume = clock.time() + scheduler.paused(PROFILE_URL)
+    sent = send(scheduler, PROFILE_URL, 1)
+    checks.append(("host resumes after its pause", sent[0] >= resume - MARGIN,
+                   "sent at {:.3f} s, pause over at {:.3f} s".format(sent[0], resume)))
+
+    send(scheduler, PROFILE_URL, 8)
+    checks.append(("rate raised after good pages", abs(scheduler.rate - rate) <= MARGIN,
+                   "{:.3f} requests/s".format(scheduler.rate)))
+    return checks
+
+
+def check_priorities():
+    """
+    Checks that a fresh request waiting for a busy host goes before a refresh that waited longer
+    :return: List of (check, passed, detail) tuples
+    """
+    scheduler = Scheduler(rate=1.0, burst=10, per_host=1, clock=SimulatedClock())
+    order = list()
+
+    def request(priority):
+        with scheduler.slot(PROFILE_URL, priority):
+            order.append(priority)
+
+    # Holds the host, so the other requests queue up in the order they are started
+    scheduler.acquire(PROFILE_URL)
+    threads = list()
+    for priority in [REFRESH, FRESH]:
+        thread = threading.Thread(target=request, args=(priority,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    scheduler.release(PROFILE_URL)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    return [("fresh before refresh", order == [FRESH, REFRESH],
+             "order " + ", ".join("FRESH" if priority == FRESH else "REFRESH" for priority in order))]
+
+
+def check_per_host(burst):
+    """
+    Checks that no more than per_host requests are in flight to one host
+    :return: List of (check, passed, detail) tuples
+    """
+    scheduler = Scheduler(rate=100.0, burst=burst, per_host=2, clock=SimulatedClock())
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def request():
+        with scheduler.slot(PROFILE_URL):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=request, daemon=True) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return [("per-host cap", in_flight[1] <= 2, "at most {} requests in flight (cap 2)".format(in_flight[1]))]
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    arguments.add_argument("--rate", type=float, default=2.0, help="requests per second")
+    arguments.add_argument("--burst", type=int, default=4, help="requests sent at once after an idle period")
+    arguments.add_argument("--requests", type=int, default=100, help="requests sent to check the rate")
+    options = arguments.parse_args()
+
+    checks = check_rate(options.rate, options.burst, options.requests) + check_backoff(options.rate) + \
+        check_priorities() + check_per_host(options.burst)
+
+    failures = list()
+    for check, passed, detail in checks:
+        print("{:<4} {:<30} {}".format("ok" if passed else "FAIL", check, detail))
+        if not passed:
+            failures.append(check)
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Fake selenium driver that serves recorded Crunchbase pages, for running the scraper offline
+
+The pages are listed in a manifest (fixtures/pages.json) that maps every URL to a recorded HTML file,
+and every clickable tab id to the recorded page after the click.
+"""
+import json
+import os
+import lxml.html
+
+__author__ = "Abhinav Thirupathi"
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FakeElement:
+    """ Class that represents an element of a recorded page"""
+
+    def __init__(self, driver, node):
+        """
+        Initialize a fake element
+        :param driver: FakeDriver the element belongs to
+        :param node: lxml node of the element
+        """
+        self.driver = driver
+        self.node = node
+
+    def click(self):
+        """
+        Clicks the element, tabs switch the page to their recorded state
+        :return:
+        """
+        self.driver.click(self.node.get("id"))
+
+    def get_attribute(self, name):
+        """
+        Gets an attribute of the element
+        :param name: Name of the attribute
+        :return: Value of the attribute
+        """
+        if name == "aria-selected" and self.node.get("role") == "tab":
+            return "true" if self.node.get("id") == self.driver.selected else "false"
+        if name == "outerHTML":
+            return lxml.html.tostring(self.node, encoding="unicode", with_tail=False)
+        return self.node.get(name)
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def send_keys(self, *value):
+        pass
+
+    @property
+    def text(self):
+        return self.node.text_content()
+
+
+class FakeWindow:
+    """ Class that represents a browser window of the fake driver, with its own history and page"""
+
+    def __init__(self):
+        self.history = list()
+        self.selected = None
+        self.page_source = None
+        self.tree = None
+
+
+class FakeSwitchTo:
+    """ Class that implements driver.switch_to for the windows of the fake driver"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.switch_window(handle)
+
+
+class FakeDriver:
+    """ Class that implements the part of the selenium driver used by Crunchbase, Profile and Section"""
+
+    def __init__(self, manifest=None):
+        """
+        Initialize a fake driver
+        :param manifest: Path of the manifest of the recorded pages, defaults to fixtures/pages.json
+        @attribute history: URLs of the visited pages of the current window, for back()
+        @attribute selected: Id of the selected tab on the current page
+        @attribute counts: Number of calls of every driver method
+        @attribute windows: Dictionary of the window handles to their windows
+        """
+        if manifest is None:
+            manifest = os.path.join(FIXTURES, "pages.json")
+        with open(manifest, encoding="utf-8") as manifest_file:
+            manifest_data = json.load(manifest_file)
+
+        directory = os.path.dirname(manifest)
+        self.pages = dict()
+        for url, file_name in manifest_data["pages"].items():
+            self.pages[url] = self.__read(os.path.join(directory, file_name))
+        self.clicks = dict()
+        for tab_id, file_name in manifest_data.get("clicks", {}).items():
+            self.clicks[tab_id] = self.__read(os.path.join(directory, file_name))
+
+        self.counts = dict()
+        self.windows = {"window-0": FakeWindow()}
+        self.switch_to = FakeSwitchTo(self)
+        self.__handle = "window-0"
+        self.__opened = 0
+
+    @staticmethod
+    def __read(path):
+        with open(path, encoding="utf-8") as html_file:
+            return html_file.read()
+
+    def __count(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def window(self):
+        return self.windows[self.__handle]
+
+    @property
+    def history(self):
+        return self.window.history
+
+    @property
+    def selected(self):
+        return self.window.selected
+
+    def __load(self, page_source):
+        self.window.page_source = page_source
+        self.window.tree = None
+
+    def __root(self):
+        if self.window.tree is None:
+            self.window.tree = lxml.html.fromstring(self.window.page_source)
+        return self.window.tree
+
+    @property
+    def current_window_handle(self):
+        return self.__handle
+
+    @property
+    def window_handles(self):
+        return list(self.windows)
+
+    def switch_window(self, handle):
+        self.__count("switch_to_window")
+        if handle not in self.windows:
+            raise LookupError("No window: '" + handle + "'")
+        self.__handle = handle
+
+    def open_window(self, url):
+        self.__count("open_window")
+        self.__opened += 1
+        handle = "window-" + str(self.__opened)
+        self.windows[handle] = FakeWindow()
+        current = self.__handle
+        self.__handle = handle
+        try:
+            self.__visit(url)
+        finally:
+            self.__handle = current
+
+    def close(self):
+        self.__count("close")
+        del self.windows[self.__handle]
+
+    def __visit(self, url):
+        if url not in self.pages:
+            raise LookupError("Page not recorded: '" + url + "'")
+        self.history.append(url)
+        self.window.selected = None
+        self.__load(self.pages[url])
+
+    def get(self, url):
+        self.__count("get")
+        self.__visit(url)
+
+    def back(self):
+        self.__count("back")
+        if len(self.history) > 1:
+            self.history.pop()
+            self.window.selected = None
+            self.__load(self.pages[self.history[-1]])
+
+    def click(self, element_id):
+        self.__count("click")
+        if element_id in self.clicks:
+            self.window.selected = element_id
+            self.__load(self.clicks[element_id])
+
+    @property
+    def page_source(self):
+        self.__count("page_source")
+        return self.window.page_source
+
+    @property
+    def current_url(self):
+        return self.history[-1] if len(self.history) > 0 else None
+
+    def find_elements_by_xpath(self, xpath):
+        self.__count("find_elements_by_xpath")
+        return [FakeElement(self, node) for node in self.__root().xpath(xpath)]
+
+    def find_element_by_xpath(self, xpath):
+        self.__count("find_element_by_xpath")
+        nodes = self.__root().xpath(xpath)
+        if len(nodes) == 0:
+            raise LookupError("No element matches: '" + xpath + "'")
+        return FakeElement(self, nodes[0])
+
+    def execute_script(self, script, *args):
+        """
+        Runs the scripts used by the scraper against the recorded page
+        :param script: The JavaScript
+        :return: Value returned by the script
+        """
+        self.__count("execute_script")
+        if "getElementsByTagName('*').length" in script:
+            return sum(1 for _ in self.__root().iter())
+        if "window.open(" in script:
+            return self.open_window(args[0])
+        if "outerHTML" in script:
+            tag, index = args
+            nodes = list(self.__root().iter(tag))
+            return lxml.html.tostring(nodes[index], encoding="unicode", with_tail=False) if index < len(nodes) else None
+        raise NotImplementedError("Script not supported by the fake driver: " + script)
+
+    def delete_all_cookies(self):
+        self.__count("delete_all_cookies")
+
+    def quit(self):
+        self.__count("quit")
@@ -0,0 +1,161 @@
+"""
+Offline benchmark suite of the scraper, on recorded Crunchbase pages served by a fake selenium driver
+
+Runs the public and the Pro scraping of the recorded profile end to end, and reports the time per profile,
+the time spent in every card parser, the calls made to the driver, and the peak memory.
+With --baseline, exits with status 1 when a timing regressed by more than --tolerance, for CI.
+
+Usage: python benchmarks/run.py [--repeat N] [--parser NAME] [--windows N] [--json OUT] [--baseline FILE]
+                                [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "code"))
+from fake_driver import FakeDriver
+from profile import Profile
+from section import Section
+from wait import Wait
+
+__author__ = "Abhinav Thirupathi"
+
+PROFILE_URL = "https://www.crunchbase.com/organization/acme-robotics"
+
+
+def timed_parsers(timings):
+    """
+    Wraps every registered card parser to add its duration to the timings
+    :param timings: Dictionary of card type to [calls, seconds]
+    :return: Dictionary of the original card parsers, to restore them
+    """
+    original = dict(Section.card_parsers)
+
+    def wrap(card_type, parser):
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return parser(*args)
+            finally:
+                timing = timings.setdefault(card_type, [0, 0.0])
+                timing[0] += 1
+                timing[1] += time.perf_counter() - start
+        return timed
+
+    for card_type, parser in original.items():
+        Section.card_parsers[card_type] = wrap(card_type, parser)
+    return original
+
+
+def scrape(pro, parser, windows=1):
+    """
+    Scrapes the recorded profile once
+    :param pro: True to scrape the Pro profile (tabs-card clicks and more-results pages)
+    :param parser: BeautifulSoup parser
+    :param windows: Number of windows the tab pages and more-results pages are loaded in
+    :return: (data, driver call counts)
+    """
+    driver = FakeDriver()
+    profile = Profile(wait=Wait(poll=0, settle=0), parser=parser, windows=windows)
+    profile.get_profile_page(url=PROFILE_URL, driver=driver)
+    profile.process_profile(pro=pro, driver=driver)
+    return profile.get_data(), driver.counts
+
+
+def run_scenario(pro, parser, repeat, windows=1):
+    """
+    Runs a scenario and measures it
+    :param pro: True for the Pro scenario
+    :param parser: BeautifulSoup parser
+    :param windows: Number of windows the tab pages and more-results pages are loaded in
+    :param repeat: Number of times the profile is scraped
+    :return: Dictionary with the measurements
+    """
+    # Warms up the imports and caches, and measures the peak memory of one profile
+    tracemalloc.start()
+    scrape(pro, parser, windows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    card_timings = dict()
+    original = timed_parsers(card_timings)
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            _, counts = scrape(pro, parser, windows)
+        seconds = (time.perf_counter() - start) / repeat
+    finally:
+        Section.card_parsers.clear()
+        Section.card_parsers.update(original)
+
+    return {
+        "profile_ms": seconds * 1000,
+        "peak_memory_kb": peak / 1024,
+        "cards": {card_type: {"calls": calls // repeat, "ms": total / repeat * 1000}
+                  for card_type, (calls, total) in sorted(card_timings.items())},
+        "driver_calls": counts,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the timings to a baseline
+    :param results: Measurements of this run
+    :param baseline: Measurements of the baseline run
+    :param tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+    :return: List of the regressions as strings
+    """
+    regressions = list()
+    for scenario, measurements in results.items():
+        if scenario not in baseline:
+            continue
+        pairs = [("profile", measurements["profile_ms"], baseline[scenario]["profile_ms"])]
+        for card_type, card in measurements["cards"].items():
+            if card_type in baseline[scenario]["cards"]:
+                pairs.append((card_type, card["ms"], baseline[scenario]["cards"][card_type]["ms"]))
+        for name, value, reference in pairs:
+            if reference > 0 and value > reference * (1 + tolerance):
+                regressions.append("{} {}: {:.3f} ms (baseline {:.3f} ms, +{:.0%})".format(
+                    scenario, name, value, reference, value / reference - 1))
+    return regressions
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    arguments.add_argument("--repeat", type=int, default=20, help="number of profiles scraped per scenario")
+    arguments.add_argument("--parser", default=None, help="BeautifulSoup parser ('html.parser', 'lxml', ...)")
+    arguments.add_argument("--windows", type=int, default=1, help="number of windows the tab pages are loaded in")
+    arguments.add_argument("--json", default=None, help="path of the JSON file the measurements are written to")
+    arguments.add_argument("--baseline", default=None, help="path of the JSON measurements of a previous run")
+    arguments.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    options = arguments.parse_args()
+
+    results = {scenario: run_scenario(pro, options.parser, options.repeat, options.windows)
+               for scenario, pro in [("public", False), ("pro", True)]}
+
+    for scenario, measurements in results.items():
+        print("{}: {:.3f} ms per profile, peak memory {:.0f} KB".format(
+            scenario, measurements["profile_ms"], measurements["peak_memory_kb"]))
+        for card_type, card in measurements["cards"].items():
+            print("    {:<26} {:>4} calls {:>10.3f} ms".format(card_type, card["calls"], card["ms"]))
+        print("    driver: " + ", ".join("{} {}".format(name, calls)
+                                         for name, calls in sorted(measurements["driver_calls"].items())))
+
+    if options.json is not None:
+        with open(options.json, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=3)
+
+    if options.baseline is not None:
+        with open(options.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), options.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+__author__ = "Abhinav Thirupathi"
+
+
+class PageCache:
+    """ Class that represents a persistent, content-addressed cache of the fetched Crunchbase pages"""
+
+    def __init__(self, path=None, ttl=None, max_bytes=None, level=6):
+        """
+        Initialize a page cache stored in a directory
+        :param path: Directory of the cache, created if it doesn't exist
+        :param ttl: Number of seconds a fetched page stays valid, None keeps pages until they are evicted
+        :param max_bytes: Maximum total size of the compressed pages, least recently used pages are evicted first
+        :param level: Gzip compression level of the stored pages
+        @attribute connection: SQLite connection to the index of (url, fetch time) to page content hash
+        @attribute total: Total size of the compressed pages, kept up to date to only evict when the cache is full
+        """
+        if path is None:
+            raise TypeError("NoneType parameter: 'path'")
+
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.level = level
+        self.__lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        self.__connection = sqlite3.connect(os.path.join(path, "index.db"), check_same_thread=False)
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT, fetched REAL, digest TEXT, "
+                                  "size INTEGER, accessed REAL, PRIMARY KEY (url, fetched))")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest)")
+        self.__connection.commit()
+        self.__total = self.size()
+
+    def __blob_path(self, digest):
+        """
+        Gets the path of the compressed page content
+        :param digest: SHA-256 hash of the page content
+        :return: Path of the file
+        """
+        return os.path.join(self.path, digest[:2], digest + ".html.gz")
+
+    def put(self, url=None, page_content=None, fetched=None):
+        """
+        Stores a fetched page in the cache
+        :param url: URL of the page
+        :param page_content: HTML content of the page
+        :param fetched: Fetch time of the page in seconds since the epoch, defaults to now
+        :return: SHA-256 hash of the page content
+        """
+        if url is None or page_content is None:
+            raise TypeError("NoneType parameter: 'url' or 'page_content'")
+        if fetched is None:
+            fetched = time.time()
+
+        content = page_content.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self.__blob_path(digest)
+
+        with self.__lock:
+            # Identical pages share one compressed file
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                temp_path = blob_path + ".tmp"
+                with gzip.open(temp_path, "wb", compresslevel=self.level) as blob_file:
+                    blob_file.write(content)
+                os.replace(temp_path, blob_path)
+                self.__total += os.path.getsize(blob_path)
+
+            self.__connection.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                                      (url, fetched, digest, os.path.getsize(blob_path), fetched))
+            self.__connection.commit()
+
+        if self.max_bytes is not None and self.__total > self.max_bytes:
+            self.evict()
+        return digest
+
+    def get(self, url=None, max_age=None):
+        """
+        Gets the most recently fetched version of a page
+        :param url: URL of the page
+        :param max_age: Maximum age of the page in seconds, defaults to the cache ttl, -1 accepts any age
+        :return: HTML content of the page, or None if no valid version is cached
+        """
+        if url is None:
+            raise TypeError("NoneType parameter: 'url'")
+        if max_age is None:
+            max_age = self.ttl
+
+        now = time.time()
+        with self.__lock:
+            row = self.__connection.execute("SELECT fetched, digest FROM pages WHERE url = ? ORDER BY fetched DESC "
+                                            "LIMIT 1", (url,)).fetchone()
+            if row is None:
+                return None
+            fetched, digest = row
+            if max_age is not None and max_age >= 0 and now - fetched > max_age:
+                return None
+
+            try:
+                with gzip.open(self.__blob_path(digest), "rb") as blob_file:
+                    content = blob_file.read()
+            except FileNotFoundError:
+                self.__connection.execute("DELETE FROM pages WHERE digest = ?", (digest,))
+                self.__connection.commit()
+                return None
+
+            # Marks the page as recently used for the LRU eviction
+            self.__connection.execute("UPDATE pages SET accessed = ? WHERE url = ? AND fetched = ?", (now, url, fetched))
+            self.__connection.commit()
+
+        return content.decode("utf-8")
+
+    def size(self):
+        """
+        Gets the total size of the compressed pages referenced by the cache
+        :return: Number of bytes
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM pages)").fetchone()
+        return row[0] or 0
+
+    def evict(self):
+        """
+        Removes the expired pages, then the least recently used pages until the cache fits in max_bytes
+        :return: Number of removed page versions
+        """
+        removed = set()
+        with self.__lock:
+            if self.ttl is not None:
+                removed.update(self.__connection.execute("SELECT url, fetched, digest FROM pages WHERE fetched < ?",
+                                                         (time.time() - self.ttl,)).fetchall())
+
+            if self.max_bytes is not None:
+                sizes = dict(self.__connection.execute("SELECT DISTINCT digest, size FROM pages"))
+                references = dict(self.__connection.execute("SELECT digest, COUNT(*) FROM pages GROUP BY digest"))
+                for url, fetched, digest in removed:
+                    references[digest] -= 1
+                total = sum(size for digest, size in sizes.items() if references[digest] > 0)
+
+                # Removes the least recently used page versions, a file is freed once none of its versions is left
+                rows = self.__connection.execute("SELECT url, fetched, digest FROM pages ORDER BY accessed")
+                for url, fetched, digest in rows.fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    if (url, fetched, digest) in removed:
+                        continue
+                    removed.add((url, fetched, digest))
+                    references[digest] -= 1
+                    if references[digest] == 0:
+                        total -= sizes[digest]
+
+            self.__connection.executemany("DELETE FROM pages WHERE url = ? AND fetched = ?",
+                                          [(url, fetched) for url, fetched, _ in removed])
+            self.__connection.commit()
+
+            # Deletes the compressed files that no page version references anymore
+            for digest in {digest for _, _, digest in removed}:
+                if self.__connection.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                    try:
+                        os.remove(self.__blob_path(digest))
+                    except FileNotFoundError:
+                        pass
+
+            self.__total = self.__connection.execute("SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM pages)"
+                                                     ).fetchone()[0] or 0
+
+        return len(removed)
+
+    def close(self):
+        """
+        Closes the index of the cache
+        :return:
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+class CachedDriver:
+    """ Class that wraps a selenium driver to store every fetched page in a PageCache, or replays the cached pages"""
+
+    def __init__(self, driver=None, cache=None, replay=False):
+        """
+        Initialize a cached driver
+        :param driver: Selenium driver, None in replay mode
+        :param cache: PageCache that stores the pages
+        :param replay: If True, pages are served from the cache and no browser is used
+        @attribute static: True if the pages can't change after they are loaded (no clicks, no scripts)
+        @attribute history: URLs of the replayed pages, for back()
+        """
+        if cache is None:
+            raise TypeError("NoneType parameter: 'cache'")
+        if driver is None and replay is False:
+            raise TypeError("NoneType parameter: 'driver'")
+
+        self.driver = driver
+        self.cache = cache
+        self.replay = replay
+        self.static = replay
+        self.__history = list()
+        self.__page_source = None
+        self.__pending_url = None
+
+    def get(self, url):
+        """
+        Gets the page at the URL, from the cache in replay mode
+        :param url: URL of the page
+        :return:
+        """
+        if self.replay is True:
+            page_content = self.cache.get(url, max_age=-1)
+            if page_content is None:
+                raise LookupError("Page not in cache: '" + url + "'")
+            self.__history.append(url)
+            self.__page_source = page_content
+        else:
+            self.driver.get(url)
+            self.__pending_url = url
+
+    @property
+    def page_source(self):
+        """
+        Gets the HTML content of the current page, the first read after a navigation is stored in the cache
+        :return: HTML content of the page
+        """
+        if self.replay is True:
+            return self.__page_source
+
+        page_content = self.driver.page_source
+        if self.__pending_url is not None:
+            self.cache.put(self.__pending_url, page_content)
+            self.__pending_url = None
+        return page_content
+
+    def loaded(self, url):
+        """
+        Marks the current page as fetched from the URL, for pages loaded without get() (opened in another window)
+        :param url: URL of the page
+        :return:
+        """
+        if self.replay is False:
+            self.__pending_url = url
+
+    def store(self, url, content):
+        """
+        Stores content read without a navigation (the card a tab click swapped in), so it can be replayed
+        :param url: URL of the content, see Section.tab_url
+        :param content: HTML content
+        :return:
+        """
+        if self.replay is False:
+            self.cache.put(url, content)
+
+    def stored(self, url):
+        """
+        Gets content stored by store
+        :param url: URL of the content
+        :return: HTML content
+        """
+        content = self.cache.get(url, max_age=-1)
+        if content is None:
+            raise LookupError("Content not in cache: '" + url + "'")
+        return content
+
+    @property
+    def recording(self):
+        """
+        Checks if the current page is waiting to be stored, it is stored by the next page_source read
+        :return: True if the page wasn't stored yet, else False
+        """
+        return self.replay is False and self.__pending_url is not None
+
+    @property
+    def current_url(self):
+        """
+        Gets the URL of the current page
+        :return: The URL
+        """
+        if self.replay is True:
+            return self.__history[-1] if len(self.__history) > 0 else None
+        return self.driver.current_url
+
+    def back(self):
+        """
+        Goes back to the previous page
+        :return:
+        """
+        if self.replay is True:
+            if len(self.__history) > 1:
+                self.__history.pop()
+                self.__page_source = self.cache.get(self.__history[-1], max_age=-1)
+        else:
+            self.__pending_url = None
+            self.driver.back()
+
+    def find_elements_by_xpath(self, xpath):
+        """
+        Finds the elements matching the xpath, replayed pages have no live elements
+        :param xpath: XPath of the elements
+        :return: List of the elements
+        """
+        if self.replay is True:
+            return []
+        return self.driver.find_elements_by_xpath(xpath)
+
+    def find_element_by_xpath(self, xpath):
+        """
+        Finds the element matching the xpath, replayed pages have no live elements
+        :param xpath: XPath of the element
+        :return: The element
+        """
+        if self.replay is True:
+            raise LookupError("Replayed pages have no live elements: '" + xpath + "'")
+        return self.driver.find_element_by_xpath(xpath)
+
+    def execute_script(self, script, *args):
+        """
+        Executes JavaScript on the current page, replayed pages don't run scripts
+        :param script: The JavaScript
+        :return: Value returned by the script
+        """
+        if self.replay is True:
+            return None
+        return self.driver.execute_script(script, *args)
+
+    def quit(self):
+        """
+        Quits the wrapped selenium driver
+        :return:
+        """
+        if self.driver is not None:
+            self.driver.quit()
+
+    def __getattr__(self, name):
+        """
+        Delegates everything else to the wrapped selenium driver
+        :param name: Name of the attribute
+        :return: The attribute of the driver
+        """
+        driver = self.__dict__.get('driver')
+        if driver is None:
+            raise AttributeError(name)
+        return getattr(driver, name)
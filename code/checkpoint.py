@@ -0,0 +1,112 @@
+import pickle
+import sqlite3
+import threading
+import time
+
+__author__ = "Abhinav Thirupathi"
+
+
+class Checkpoint:
+    """ Class that represents a durable journal of the finished profiles and tab pages of a scraping run"""
+
+    def __init__(self, path=None):
+        """
+        Initialize a checkpoint journal stored in an SQLite database
+        :param path: Path of the database, created if it doesn't exist
+        @attribute connection: SQLite connection to the journal
+        """
+        if path is None:
+            raise TypeError("NoneType parameter: 'path'")
+
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS profiles (url TEXT PRIMARY KEY, name TEXT, data BLOB, "
+                                  "finished REAL)")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS tabs (url TEXT, link TEXT, data BLOB, finished REAL, "
+                                  "PRIMARY KEY (url, link))")
+        self.__connection.commit()
+
+    def is_finished(self, url=None):
+        """
+        Checks if the profile was finished
+        :param url: Crunchbase URL of the profile
+        :return: True if the profile was finished, else False
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT 1 FROM profiles WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def get_profile(self, url=None):
+        """
+        Gets the parsed data of a finished profile
+        :param url: Crunchbase URL of the profile
+        :return: Dictionary of the parsed profile data, or None if the profile wasn't finished
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT data FROM profiles WHERE url = ?", (url,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def finish_profile(self, url=None, name=None, data=None):
+        """
+        Records a finished profile, and forgets its finished tab pages
+        :param url: Crunchbase URL of the profile
+        :param name: Name of the profile
+        :param data: Dictionary of the parsed profile data
+        :return:
+        """
+        if url is None:
+            raise TypeError("NoneType parameter: 'url'")
+
+        with self.__lock:
+            with self.__connection:
+                self.__connection.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?)",
+                                          (url, name, pickle.dumps(data), time.time()))
+                self.__connection.execute("DELETE FROM tabs WHERE url = ?", (url,))
+
+    def get_tab(self, url=None, link=None):
+        """
+        Gets the parsed sections of a finished tab page
+        :param url: Crunchbase URL of the profile
+        :param link: Crunchbase URL of the tab page
+        :return: Dictionary with the parsed data of every section, or None if the tab page wasn't finished
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT data FROM tabs WHERE url = ? AND link = ?", (url, link)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def finish_tab(self, url=None, link=None, data=None):
+        """
+        Records a finished tab page of a profile
+        :param url: Crunchbase URL of the profile
+        :param link: Crunchbase URL of the tab page
+        :param data: Dictionary with the parsed data of every section of the tab page
+        :return:
+        """
+        if url is None or link is None:
+            raise TypeError("NoneType parameter: 'url' or 'link'")
+
+        with self.__lock:
+            with self.__connection:
+                self.__connection.execute("INSERT OR REPLACE INTO tabs VALUES (?, ?, ?, ?)",
+                                          (url, link, pickle.dumps(data), time.time()))
+
+    def iter_profiles(self):
+        """
+        Gets all the finished profiles, e.g. to export them again after an interrupted run
+        :return: Generator of (url, data) tuples in the order the profiles were finished
+        """
+        with self.__lock:
+            rows = self.__connection.execute("SELECT url, data FROM profiles ORDER BY finished").fetchall()
+        for url, data in rows:
+            yield url, pickle.loads(data)
+
+    def close(self):
+        """
+        Closes the journal
+        :return:
+        """
+        with self.__lock:
+            self.__connection.close()
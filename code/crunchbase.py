@@ -1,7 +1,14 @@
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-import time
 from profile import Profile
+from pool import DriverPool
+from pipeline import Pipeline
+from wait import Wait, url_changed
+from markup import resolve_parser
+from cache import CachedDriver
+from metrics import NULL_METRICS
+from driver import DriverFactory
+from session import SessionStore, logged_out, LOGIN_URL
+from scheduler import NULL_SCHEDULER, FRESH, REFRESH
+from frontier import discover
 
 __author__ = "Abhinav Thirupathi"
 
@@ -9,78 +16,234 @@ __author__ = "Abhinav Thirupathi"
 class Crunchbase:
     """ Class that represents Crunchbase website"""
 
-    def __init__(self):
+    def __init__(self, wait=None, parser=None, restrict=True, cache=None, replay=False, checkpoint=None, fetcher=None,
+                 metrics=NULL_METRICS, driver_factory=None, session=None, windows=1, scheduler=NULL_SCHEDULER,
+                 fingerprints=None, sections=None, cards=None):
         """
         Initialize a Crunchbase
+        :param wait: Wait engine shared by the profiles and sections, defaults to a new Wait
+        :param parser: BeautifulSoup parser ('html.parser', 'lxml', 'fast', ...), defaults to 'html.parser'
+        :param restrict: If True, only the row-card / section-card subtrees of the tab pages are parsed
+        :param cache: PageCache that stores every fetched page
+        :param replay: If True, the profiles are parsed from the pages in the cache without starting Chrome
+        :param checkpoint: Checkpoint journal of the finished profiles and tab pages, finished work is skipped
+        :param fetcher: HTTPFetcher used instead of Chrome for the public (pro=False) profiles
+        :param metrics: Metrics every profile, tab page, navigation, wait, page parsing and card parser is recorded in
+        :param driver_factory: DriverFactory that starts (or reuses) the Chrome drivers, defaults to a headless factory
+        :param session: SessionStore of the logged-in cookies and storage, shared by all the drivers, defaults to an
+                        in-memory store
+        :param windows: Number of browser windows a profile's tab pages (and more-results pages) are loaded in at the
+                        same time, 1 to load them one after another
+        :param scheduler: Scheduler that paces the navigations of all the drivers (give the same one to the fetcher)
+        :param fingerprints: Fingerprints of the previous runs, unchanged profiles and sections aren't parsed again
+        :param sections: Names of the sections to parse, None for all of them; the other sections are skipped with
+                         their clicks and navigations
+        :param cards: Card types (tag names) to parse, None for all of them; leaving out 'tabs-card' or
+                      'list-card-more-results' skips the Pro tab clicks or more-results navigations
         @attribute loggedIn: True if logged into Crunchbase, else False
         @attribute driver: Selenium driver
+        @attribute credentials: (email, password) used to log in again when the stored session expires
+        @attribute generation: Generation of the stored session the driver is logged in with
+        @attribute ownsFactory: True if the driver factory was created here, so its warm drivers are quit here too
         """
         self.__loggedIn = False
         self.__driver = None
+        self.__credentials = None
+        self.__generation = None
+        self.__ownsFactory = driver_factory is None
+        self.metrics = metrics
+        self.wait = wait if wait is not None else Wait(metrics=metrics)
+        self.parser = resolve_parser(parser)
+        self.restrict = restrict
+        self.cache = cache
+        self.replay = replay
+        self.checkpoint = checkpoint
+        self.fetcher = fetcher
+        self.driver_factory = driver_factory if driver_factory is not None else DriverFactory()
+        self.session = session if session is not None else SessionStore()
+        self.windows = windows
+        self.scheduler = scheduler
+        self.fingerprints = fingerprints
+        self.sections = sections
+        self.cards = cards
+
+        if replay is True and cache is None:
+            raise TypeError("NoneType parameter: 'cache'")
 
     def start_selenium(self):
         """
         Starts a selenium driver
         :return: The selenium driver
         """
-        # Starts a new selenium driver
-        self.__driver = webdriver.Chrome(ChromeDriverManager().install())
+        # Replays the cached pages without a browser
+        if self.replay is True:
+            self.__driver = CachedDriver(cache=self.cache, replay=True)
+            return
+
+        # Starts (or reuses a warm) selenium driver, and stores every page it fetches when there is a cache
+        self.__driver = self.driver_factory.acquire()
+        if self.cache is not None:
+            self.__driver = CachedDriver(driver=self.__driver, cache=self.cache)
+
+    def __browser(self):
+        """
+        Gets the selenium driver without its cache wrapper, cookies and storage are set on it directly
+        :return: The selenium driver
+        """
+        return self.__driver.driver if isinstance(self.__driver, CachedDriver) else self.__driver
+
+    def quit(self, release=False):
+        """
+        Quits the selenium driver, if one is running
+        :param release: If True, the driver is given back to the driver factory to be reused instead
+        :return:
+        """
+        if self.__driver is not None:
+            driver = self.__browser()
+            try:
+                if release is True and driver is not None:
+                    self.driver_factory.release(driver)
+                elif driver is not None:
+                    driver.quit()
+            except Exception:
+                pass
+        self.__driver = None
+        self.__loggedIn = False
+        self.__generation = None
+
+    def close(self):
+        """
+        Quits the selenium driver, and the drivers kept warm by the driver factory
+        :return:
+        """
+        self.quit()
+        self.driver_factory.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __close_factory(self):
+        """
+        Quits the drivers kept warm by the driver factory, unless the caller gave the factory (and may reuse it)
+        :return:
+        """
+        if self.__ownsFactory is True:
+            self.driver_factory.close()
 
     def login(self, email=None, password=None):
         """
-        Logs into Crunchbase
+        Logs into Crunchbase, restoring the stored session when there is one instead of filling the login form
         :param email: Email to login
         :param password: Password to login
         :return: Selenium driver after logging into Crunchbase
         """
         if email is not None and password is not None:
-            # Logins into the Crunchbase after getting selenium driver with Crunchbase login page
-            self.start_selenium()
+            self.__credentials = (email, password)
+            if self.__driver is None:
+                self.start_selenium()
 
-            self.__driver.get(url="https://www.crunchbase.com/login")
-            time.sleep(10)
+            # Only the first driver fills the login form, the others (and later runs) get its cookies and storage
+            self.__generation = self.session.refresh(self.__browser(), None, self.__login_form)
+            self.__loggedIn = True
 
-            email_input = self.__driver.find_elements_by_xpath("//input[@name='email']")
-            email_input[0].send_keys(email)
+        else:
+            raise TypeError("NoneType parameter: 'email' or 'url'")
 
-            password_input = self.__driver.find_elements_by_xpath("//input[@name='password']")
-            password_input[0].send_keys(password)
+    def __login_form(self, driver):
+        """
+        Logs the driver into Crunchbase with the login form
+        :param driver: Selenium driver
+        :return:
+        """
+        email, password = self.__credentials
+        driver.get(url=LOGIN_URL)
+        email_input = self.wait.elements(driver, "//input[@name='email']", label="login-form")
+        email_input[0].send_keys(email)
 
-            login_button = self.__driver.find_element_by_xpath("//button[@type='submit']")
-            login_button.click()
-            time.sleep(10)
+        password_input = driver.find_elements_by_xpath("//input[@name='password']")
+        password_input[0].send_keys(password)
 
-            self.__loggedIn = True
+        login_button = driver.find_element_by_xpath("//button[@type='submit']")
+        login_button.click()
+        self.wait.until(driver, url_changed(LOGIN_URL), label="login")
+        self.wait.settled(driver)
 
-        else:
-            raise TypeError("NoneType parameter: 'email' or 'url'")
+    def __ensure_session(self, force=False):
+        """
+        Logs the driver in again when its session expired, from a newer stored session if another driver refreshed it
+        :param force: If True, the session is refreshed even if the store still trusts it
+        :return: True if the session was refreshed, else False
+        """
+        if self.replay is True or self.__credentials is None:
+            return False
+        if force is True or self.session.expired() or self.session.generation > (self.__generation or 0):
+            self.__generation = self.session.refresh(self.__browser(), None if force is False else self.__generation,
+                                                     self.__login_form)
+            return True
+        return False
 
-    def process_profile(self, pro=False, name=None, url=None):
+    def process_profile(self, pro=False, name=None, url=None, sink=None, priority=FRESH):
         """
         Parses the profile page
         :param pro: If the logged into Crunchbase Pro its True, else False
         :param name: Name of the profile
         :param url: Crunchbase URL of the profile
+        :param sink: Writer (JSONLWriter, GzipJSONLWriter, ...) the parsed profile is written to
+        :param priority: Priority of the profile's requests in the scheduler (FRESH, REFRESH), lower values go first
         :return: Dictionary of the parsed profile data
         """
+        with self.metrics.timer("profile", url=url):
+            return self.__process_profile(pro=pro, name=name, url=url, sink=sink, priority=priority)
+
+    def __process_profile(self, pro=False, name=None, url=None, sink=None, priority=FRESH):
+        """
+        Parses the profile page, see process_profile
+        """
+        # Skips the profiles finished before an interruption
+        if self.checkpoint is not None and url is not None and self.checkpoint.is_finished(url):
+            return self.checkpoint.get_profile(url)
+
         # Crunchbase profile object
-        profile = Profile(name)
+        profile = Profile(name, wait=self.wait, parser=self.parser, restrict=self.restrict, checkpoint=self.checkpoint,
+                          metrics=self.metrics, windows=self.windows, scheduler=self.scheduler, priority=priority,
+                          fingerprints=self.fingerprints, sections=self.sections, cards=self.cards)
 
-        # Parses public profile page using selenium
+        # Parses public profile page using selenium, or over HTTP without a browser
         if name is not None and url is not None:
-            if pro is False:
-                if self.__driver is not None and self.__loggedIn is True:
-                    self.__driver.quit()
-                if self.__driver is None and self.__loggedIn is False:
+            if pro is False and self.fetcher is not None and self.replay is False:
+                data = self.fetcher.process_profile(name=name, url=url, parser=self.parser, restrict=self.restrict,
+                                                    priority=priority, fingerprints=self.fingerprints,
+                                                    sections=self.sections, cards=self.cards)
+                if sink is not None and data is not None:
+                    sink.write(data)
+                if self.checkpoint is not None and data is not None:
+                    self.checkpoint.finish_profile(url=url, name=name, data=data)
+                return data
+            elif pro is False:
+                # A logged-in driver reads the public pages too, so its session is kept for the next Pro profile
+                if self.__driver is None:
                     self.start_selenium()
                 self.__driver = profile.get_profile_page(url=url, driver=self.__driver)
-                profile.process_profile(pro=False, driver=self.__driver)
+                if not profile.reuse(pro=False):
+                    profile.process_profile(pro=False, driver=self.__driver)
             # Parses profile page when pro is enabled after logging in with selenium
-            elif pro or self.__loggedIn is True:
+            elif self.__loggedIn is True or self.replay is True:
+                if self.__driver is None and self.replay is True:
+                    self.start_selenium()
+                self.__ensure_session()
                 self.__driver = profile.get_profile_page(url=url, driver=self.__driver)
-                profile.process_profile(pro=True, driver=self.__driver)
+
+                # Crunchbase sends expired sessions to the login page, the page is loaded again after a new login
+                if self.replay is False and logged_out(self.__driver):
+                    self.__ensure_session(force=True)
+                    self.__driver = profile.get_profile_page(url=url, driver=self.__driver)
+                if not profile.reuse(pro=True):
+                    profile.process_profile(pro=True, driver=self.__driver)
             # Raises error when parsing a pro page without logging into Crunchbase Pro
-            elif pro and self.__loggedIn is False:
+            else:
                 raise TypeError("Not logged into Crunchbase")
         else:
             if name is None and url is not None:
@@ -92,4 +255,205 @@ class Crunchbase:
 
         # Returns the parsed profile data
         data = profile.get_data()
+        if sink is not None and data is not None:
+            sink.write(data)
+        if self.checkpoint is not None and data is not None:
+            self.checkpoint.finish_profile(url=url, name=name, data=data)
         return data
+
+    def iter_profiles(self, urls=None, pro=False, sink=None):
+        """
+        Parses the profile pages one after another with this object's driver
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :param pro: If the logged into Crunchbase Pro its True, else False
+        :param sink: Writer every parsed profile is written to
+        :return: Generator of the dictionaries of the parsed profiles, each yielded as soon as it is parsed
+        """
+        for name, url in self.__pending(urls):
+            data = self.process_profile(pro=pro, name=name, url=url, sink=sink)
+            if data is not None:
+                yield data
+
+    def fetch_snapshot(self, name=None, url=None):
+        """
+        Gets the HTML content of the profile page and of all its tab pages, without parsing the sections
+        :param name: Name of the profile
+        :param url: Crunchbase URL of the profile
+        :return: Dictionary with the 'name', 'url', 'page' (profile page) and 'tabs' (tab pages) of the profile
+        """
+        if name is None or url is None:
+            raise TypeError("NoneType parameter: 'name' or 'url'")
+
+        profile = Profile(name, wait=self.wait, parser=self.parser, restrict=self.restrict, metrics=self.metrics,
+                          scheduler=self.scheduler)
+        if self.__driver is None:
+            self.start_selenium()
+        self.__driver = profile.get_profile_page(url=url, driver=self.__driver)
+
+        return {'name': name, 'url': url, 'page': profile.get_page(), 'tabs': list(profile.fetch_pages(self.__driver))}
+
+    def new_worker(self, pro=False):
+        """
+        Creates another Crunchbase object with its own selenium driver
+        :param pro: If True, the new object logs in from the stored session, with the form only if it expired
+        :return: The new Crunchbase object
+        """
+        crunchbase = Crunchbase(wait=Wait(timeout=self.wait.timeout, poll=self.wait.poll, settle=self.wait.settle,
+                                          metrics=self.metrics, recent=self.wait.timings.maxlen),
+                                parser=self.parser, restrict=self.restrict, cache=self.cache, replay=self.replay,
+                                checkpoint=self.checkpoint, fetcher=self.fetcher, metrics=self.metrics,
+                                driver_factory=self.driver_factory, session=self.session, windows=self.windows,
+                                scheduler=self.scheduler, fingerprints=self.fingerprints, sections=self.sections,
+                                cards=self.cards)
+        if pro is True and self.replay is False:
+            if self.__credentials is None:
+                raise TypeError("Not logged into Crunchbase")
+            crunchbase.login(*self.__credentials)
+        return crunchbase
+
+    def process_profiles(self, urls=None, workers=1, pro=False, retries=2, processes=0, queue_size=8, ordered=True,
+                         sink=None, priority=FRESH):
+        """
+        Parses many profile pages with a pool of selenium drivers
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :param workers: Number of independent drivers in the pool
+        :param pro: If the logged into Crunchbase Pro its True, else False
+        :param retries: Number of times a profile is handed to another driver after its driver failed
+        :param processes: If more than 0, the drivers only fetch the pages and this many processes parse them
+                          (ignored for public profiles when there is a fetcher)
+        :param queue_size: Maximum number of fetched profiles waiting to be parsed, when processes is more than 0
+        :param ordered: If True, profiles are yielded in input order, when processes is more than 0
+        :param sink: Writer every parsed profile is written to, as soon as it is parsed
+        :param priority: Priority of the profiles' requests in the scheduler (FRESH, REFRESH), lower values go first
+        :return: Generator of (name, data) tuples in the order the profiles finish, data is None if every attempt failed
+        """
+        results = self.__process_profiles(urls=urls, workers=workers, pro=pro, retries=retries, processes=processes,
+                                          queue_size=queue_size, ordered=ordered, sink=sink, priority=priority)
+        try:
+            yield from results
+        finally:
+            # Stops the pooled drivers first, they give their drivers back to the factory when they stop
+            results.close()
+            self.__close_factory()
+
+    def __process_profiles(self, urls=None, workers=1, pro=False, retries=2, processes=0, queue_size=8, ordered=True,
+                           sink=None, priority=FRESH):
+        """
+        Parses many profile pages, see process_profiles, the drivers given back to the factory are kept warm
+        """
+        urls = self.__pending(urls)
+
+        # Fetches the public profiles over HTTP, many at the same time
+        pooled = False
+        if pro is False and self.fetcher is not None and self.replay is False:
+            results = self.fetcher.process_profiles(urls=urls, parser=self.parser, restrict=self.restrict,
+                                                    priority=priority, fingerprints=self.fingerprints,
+                                                    sections=self.sections, cards=self.cards)
+        # Fetches and parses in separate stages, Pro cards need a live driver so they are parsed with the driver
+        elif processes > 0:
+            if pro is True:
+                raise ValueError("Pro profiles can't be parsed in separate processes")
+            pipeline = Pipeline(crunchbase=self, workers=workers, processes=processes, queue_size=queue_size,
+                                ordered=ordered, retries=retries)
+            results = pipeline.run(urls=urls)
+        else:
+            pool = DriverPool(factory=lambda: self.new_worker(pro=pro), size=workers, retries=retries,
+                              task=lambda crunchbase, name, url, pro: crunchbase.process_profile(
+                                  pro=pro, name=name, url=url, priority=priority))
+            results = pool.run(urls=urls, pro=pro)
+            pooled = True
+
+        for name, data in results:
+            if data is not None:
+                if sink is not None:
+                    sink.write(data)
+
+                # Pooled drivers record their own profiles, the other profiles are recorded here
+                if not pooled and self.checkpoint is not None:
+                    for profile_data in data.values():
+                        self.checkpoint.finish_profile(url=profile_data["Crunchbase URL"], name=name, data=data)
+            yield name, data
+
+    def refresh(self, urls=None, workers=1, pro=False, retries=2, sink=None):
+        """
+        Parses the profiles again, reusing the profiles and sections unchanged since the previous run, and gets the changes
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :param workers: Number of independent drivers in the pool
+        :param pro: If the logged into Crunchbase Pro its True, else False
+        :param retries: Number of times a profile is handed to another driver after its driver failed
+        :param sink: Writer the changes of every changed profile are written to
+        :return: Generator of (name, changes) tuples of the changed profiles, see fingerprint.diff_profiles
+        """
+        if self.fingerprints is None:
+            raise TypeError("NoneType attribute: 'fingerprints'")
+
+        # New profiles are scraped ahead of the refreshes by a shared scheduler
+        for name, data in self.process_profiles(urls=urls, workers=workers, pro=pro, retries=retries,
+                                                priority=REFRESH):
+            if data is None:
+                continue
+            for profile_data in data.values():
+                changes = self.fingerprints.get_changes(profile_data["Crunchbase URL"])
+                if changes is not None:
+                    if sink is not None:
+                        sink.write(changes)
+                    yield name, changes
+
+    def crawl(self, seeds=None, frontier=None, depth=1, workers=1, pro=False, batch_size=100, sink=None, **options):
+        """
+        Parses the seed profiles, then the profiles they link to (investors, founders, people, ...), breadth-first
+        :param seeds: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :param frontier: Frontier of the crawl, a crawl started with the same frontier resumes where it stopped
+        :param depth: Maximum number of links between a seed and a crawled profile, 0 to only parse the seeds
+        :param workers: Number of independent drivers in the pool
+        :param pro: If the logged into Crunchbase Pro its True, else False
+        :param batch_size: Number of profiles taken from the frontier and handed to process_profiles at once
+        :param sink: Writer every parsed profile is written to
+        :param options: Other parameters of process_profiles (retries, processes, priority, ...)
+        :return: Generator of (name, data) tuples, data is None if every attempt failed
+        """
+        if frontier is None:
+            raise TypeError("NoneType parameter: 'frontier'")
+        if seeds is not None:
+            frontier.add(seeds.items() if isinstance(seeds, dict) else seeds, depth=0)
+
+        # The drivers are kept warm from one batch to the next
+        try:
+            while True:
+                batch = frontier.next(batch_size)
+                if len(batch) == 0:
+                    break
+
+                # Finishes a depth before starting the next one
+                batch = [item for item in batch if item[2] == batch[0][2]]
+
+                # Queues the linked profiles as soon as a profile is parsed, the URLs already seen are ignored
+                link_depth = batch[0][2] + 1
+                results = self.__process_profiles(urls=[(name, url) for name, url, _ in batch], workers=workers,
+                                                  pro=pro, sink=sink, **options)
+                try:
+                    for name, data in results:
+                        if data is not None and link_depth <= depth:
+                            frontier.add(discover(data), depth=link_depth)
+                        yield name, data
+                finally:
+                    results.close()
+
+                frontier.finish(url for _, url, _ in batch)
+        finally:
+            self.__close_factory()
+
+    def __pending(self, urls):
+        """
+        Gets the profiles that are not finished in the checkpoint
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :return: Generator of (name, url) tuples
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+        if isinstance(urls, dict):
+            urls = urls.items()
+
+        for name, url in urls:
+            if self.checkpoint is None or not self.checkpoint.is_finished(url):
+                yield name, url
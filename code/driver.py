@@ -0,0 +1,227 @@
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+
+__author__ = "Abhinav Thirupathi"
+
+# Directory where the resolved chromedriver path is remembered between runs
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "crunchbase-scraper")
+
+# Names of the Chrome binaries whose version is checked against the remembered chromedriver
+CHROME_BINARIES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+# URL patterns of the resource types the parser never needs: images, media, fonts and trackers
+BLOCKED_URLS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.mp4", "*.webm", "*.mp3",
+                "*.woff", "*.woff2", "*.ttf", "*.otf", "*google-analytics.com*", "*googletagmanager.com*",
+                "*doubleclick.net*", "*facebook.net*", "*hotjar.com*", "*segment.io*", "*intercom.io*"]
+
+
+class DriverFactory:
+    """ Class that creates tuned Chrome drivers from a chromedriver binary resolved once, and keeps warm drivers"""
+
+    # chromedriver path resolved in this process, shared by all the factories
+    __driver_path = None
+    __lock = threading.Lock()
+
+    def __init__(self, headless=True, block=True, blocked_urls=None, window_size=(1366, 1024), page_load='eager',
+                 cache_dir=CACHE_DIR, arguments=None):
+        """
+        Initialize a driver factory
+        :param headless: If True, Chrome runs without a window
+        :param block: If True, the blocked URLs (images, media, fonts, trackers) are never downloaded
+        :param blocked_urls: URL patterns to block, defaults to BLOCKED_URLS
+        :param window_size: (width, height) of the window, the Crunchbase layout depends on it
+        :param page_load: Page load strategy, 'eager' returns from get() once the DOM is ready
+        :param cache_dir: Directory where the resolved chromedriver path is remembered
+        :param arguments: List of extra Chrome command line arguments
+        @attribute warm: Queue of started drivers waiting to be used
+        """
+        self.headless = headless
+        self.block = block
+        self.blocked_urls = blocked_urls if blocked_urls is not None else BLOCKED_URLS
+        self.window_size = window_size
+        self.page_load = page_load
+        self.cache_dir = cache_dir
+        self.arguments = arguments if arguments is not None else list()
+        self.__warm = queue.Queue()
+
+    def driver_path(self, stale=None):
+        """
+        Gets the path of the chromedriver binary, downloading it only if no cached binary matches the installed Chrome
+        :param stale: Path of a chromedriver that couldn't start a session, it is resolved again unless another thread
+                      already did
+        :return: Path of the chromedriver binary
+        """
+        with DriverFactory.__lock:
+            if DriverFactory.__driver_path is not None and DriverFactory.__driver_path != stale and \
+                    os.path.exists(DriverFactory.__driver_path):
+                return DriverFactory.__driver_path
+
+            # Reuses the binary resolved by a previous run, if it was resolved for the same major version of Chrome
+            cache_path = os.path.join(self.cache_dir, "chromedriver.json")
+            cached = dict()
+            try:
+                with open(cache_path, encoding="utf-8") as cache_file:
+                    cached = json.load(cache_file)
+            except (OSError, ValueError):
+                pass
+            driver_path = cached.get("path")
+            browser = self.browser_version()
+
+            if driver_path is None or driver_path == stale or not os.path.exists(driver_path) or \
+                    (browser is not None and major_version(browser) != major_version(cached.get("driver"))):
+                from webdriver_manager.chrome import ChromeDriverManager
+                driver_path = ChromeDriverManager().install()
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(cache_path, "w", encoding="utf-8") as cache_file:
+                    json.dump({"path": driver_path, "browser": browser, "driver": binary_version(driver_path)},
+                              cache_file)
+
+            DriverFactory.__driver_path = driver_path
+            return driver_path
+
+    def browser_version(self):
+        """
+        Gets the version of the installed Chrome
+        :return: Version of Chrome, or None if no Chrome binary was found
+        """
+        for binary in CHROME_BINARIES:
+            path = shutil.which(binary)
+            if path is not None:
+                version = binary_version(path)
+                if version is not None:
+                    return version
+        return None
+
+    def options(self):
+        """
+        Creates the Chrome options
+        :return: Chrome options
+        """
+        # Selenium is only imported once a driver is needed, the parse-only workers never load it
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless")
+        for argument in ["--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage", "--disable-extensions",
+                         "--disable-background-networking", "--mute-audio", "--no-first-run"]:
+            options.add_argument(argument)
+        options.add_argument("--window-size={},{}".format(*self.window_size))
+        for argument in self.arguments:
+            options.add_argument(argument)
+
+        # Doesn't load images (the blocked URLs also cover the other resource types)
+        if self.block:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+        if self.page_load is not None:
+            options.set_capability("pageLoadStrategy", self.page_load)
+        return options
+
+    def create(self):
+        """
+        Starts a new Chrome driver
+        :return: Selenium driver
+        """
+        from selenium import webdriver
+        from selenium.common.exceptions import SessionNotCreatedException
+
+        driver_path = self.driver_path()
+        try:
+            driver = webdriver.Chrome(executable_path=driver_path, options=self.options())
+        except SessionNotCreatedException:
+            # Chrome was updated past the remembered chromedriver, a matching one is resolved
+            driver = webdriver.Chrome(executable_path=self.driver_path(stale=driver_path), options=self.options())
+
+        # Blocks the requests of the non-essential resources in the browser's network layer
+        if self.block and len(self.blocked_urls) > 0:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_urls})
+            except Exception:
+                pass
+        return driver
+
+    def warm(self, count=1):
+        """
+        Starts drivers in the background, so they are ready when they are acquired
+        :param count: Number of drivers to start
+        :return: List of the threads starting the drivers
+        """
+        threads = [threading.Thread(target=lambda: self.__warm.put(self.create()), daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def acquire(self):
+        """
+        Gets a warm driver, or starts a new one if none is ready
+        :return: Selenium driver
+        """
+        try:
+            return self.__warm.get_nowait()
+        except queue.Empty:
+            return self.create()
+
+    def release(self, driver):
+        """
+        Gives back a driver to be reused by the next acquire, instead of quitting it, without its cookies
+        :param driver: Selenium driver
+        :return:
+        """
+        if driver is None:
+            return
+        try:
+            # Forgets the login, the next worker may scrape public profiles only, or log in as another user
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            self.__warm.put(driver)
+        except Exception:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def close(self):
+        """
+        Quits all the warm drivers
+        :return:
+        """
+        while True:
+            try:
+                driver = self.__warm.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def binary_version(path):
+    """
+    Gets the version printed by a Chrome or chromedriver binary
+    :param path: Path of the binary
+    :return: Version (e.g. '96.0.4664.45'), or None if the binary couldn't be run
+    """
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r"\d+(\.\d+)+", output)
+    return match.group(0) if match is not None else None
+
+
+def major_version(version):
+    """
+    Gets the major version of a version
+    :param version: Version (e.g. '96.0.4664.45'), or None
+    :return: Major version (e.g. '96'), or None
+    """
+    return version.split(".")[0] if version is not None else None
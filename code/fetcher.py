@@ -0,0 +1,311 @@
+import asyncio
+import queue
+import threading
+import aiohttp
+from profile import Profile
+from scheduler import NULL_SCHEDULER, FRESH
+
+__author__ = "Abhinav Thirupathi"
+
+# Origin of the URLs built by the Profile and Section parsers
+CRUNCHBASE_URL = "https://www.crunchbase.com"
+
+# Headers of a regular browser request for an HTML page
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class HTTPFetcher:
+    """ Class that fetches the server-rendered public profile pages over pooled HTTP connections, without a browser"""
+
+    def __init__(self, concurrency=32, per_host=8, timeout=30, keepalive=30, retries=2, headers=None, base_url=None,
+                 cache=None, scheduler=NULL_SCHEDULER):
+        """
+        Initialize an HTTP fetcher
+        :param concurrency: Maximum number of open connections, and of profiles being fetched at the same time
+        :param per_host: Maximum number of open connections to one host
+        :param timeout: Number of seconds before a request is abandoned
+        :param keepalive: Number of seconds an idle connection is kept open for the next request
+        :param retries: Number of times a failed request is retried
+        :param headers: Headers of every request, defaults to DEFAULT_HEADERS
+        :param base_url: Origin that replaces https://www.crunchbase.com in the requests, e.g. a local stub server
+        :param cache: PageCache that stores every fetched page
+        :param scheduler: Scheduler that paces the requests, shared with the other fetchers and drivers
+        """
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.retries = retries
+        self.headers = headers if headers is not None else DEFAULT_HEADERS
+        self.base_url = base_url
+        self.cache = cache
+        self.scheduler = scheduler
+
+    def session(self):
+        """
+        Creates an HTTP session with a pool of keep-alive connections
+        :return: aiohttp client session
+        """
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                         keepalive_timeout=self.keepalive)
+        return aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                     timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    def request_url(self, url):
+        """
+        Gets the URL to request for a Crunchbase URL
+        :param url: Crunchbase URL
+        :return: The URL on the base URL, if there is one
+        """
+        if self.base_url is not None and url.startswith(CRUNCHBASE_URL):
+            return self.base_url.rstrip("/") + url[len(CRUNCHBASE_URL):]
+        return url
+
+    async def acquire(self, url, priority=FRESH):
+        """
+        Waits in a thread for the scheduler, so the event loop keeps serving the other connections. When the task is
+        cancelled, the thread stops waiting, and a slot it was granted anyway is released
+        :param url: URL of the request
+        :param priority: Priority of the request in the scheduler, lower values are sent first
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        lock = threading.Lock()
+        granted = list()
+
+        def wait():
+            acquired = self.scheduler.acquire(url, priority, cancelled=cancelled)
+            with lock:
+                if acquired and cancelled.is_set():
+                    self.scheduler.release(url, ok=None)
+                elif acquired:
+                    granted.append(url)
+
+        try:
+            await loop.run_in_executor(None, wait)
+        except asyncio.CancelledError:
+            with lock:
+                cancelled.set()
+                if len(granted) > 0:
+                    self.scheduler.release(url, ok=None)
+            self.scheduler.wake()
+            raise
+
+    async def fetch(self, session, url, priority=FRESH):
+        """
+        Gets the HTML content of a page
+        :param session: aiohttp client session
+        :param url: Crunchbase URL of the page
+        :param priority: Priority of the request in the scheduler, lower values are sent first
+        :return: The HTML content of the page
+        """
+        for attempt in range(0, self.retries + 1):
+            if self.scheduler.enabled:
+                await self.acquire(url, priority)
+            ok = False
+            try:
+                async with session.get(self.request_url(url)) as response:
+                    response.raise_for_status()
+                    page_content = await response.text()
+
+                # Pages without sections are blocked or empty, they are fetched again after a backoff
+                ok = "<row-card" in page_content
+                if ok or attempt == self.retries:
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            except asyncio.CancelledError:
+                # A cancelled request says nothing about the host, it isn't backed off
+                ok = None
+                raise
+            finally:
+                self.scheduler.release(url, ok=ok)
+
+            # The scheduler pauses the blocked host itself
+            if not self.scheduler.enabled:
+                await asyncio.sleep(2 ** attempt)
+
+        if self.cache is not None:
+            self.cache.put(url, page_content)
+        return page_content
+
+    async def fetch_profile(self, session, name=None, url=None, parser=None, restrict=True, priority=FRESH,
+                            fingerprints=None, sections=None, cards=None):
+        """
+        Gets the profile page, then all its tab pages at the same time, and parses them
+        :param session: aiohttp client session
+        :param name: Name of the profile
+        :param url: Crunchbase URL of the profile
+        :param parser: BeautifulSoup parser
+        :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+        :param priority: Priority of the requests in the scheduler
+        :param fingerprints: Fingerprints of the previous runs, the tab pages of an unchanged profile aren't fetched
+        :param sections: Names of the sections to parse, None for all of them
+        :param cards: Card types to parse, None for all of them
+        :return: Dictionary of the parsed profile data
+        """
+        if name is None or url is None:
+            raise TypeError("NoneType parameter: 'name' or 'url'")
+
+        loop = asyncio.get_running_loop()
+        profile = Profile(name, parser=parser, restrict=restrict, fingerprints=fingerprints, sections=sections,
+                          cards=cards)
+
+        # Parses in a thread, so the event loop keeps serving the other connections
+        page_content = await self.fetch(session, url, priority)
+        await loop.run_in_executor(None, lambda: profile.load_page(url=url, page_content=page_content))
+        if await loop.run_in_executor(None, profile.reuse):
+            return profile.get_data()
+
+        pages = await asyncio.gather(*[self.fetch(session, link, priority) for link in profile.get_tab_links()])
+        await loop.run_in_executor(None, lambda: profile.parse_pages(pages))
+        return profile.get_data()
+
+    def process_profile(self, name=None, url=None, parser=None, restrict=True, priority=FRESH, fingerprints=None,
+                        sections=None, cards=None):
+        """
+        Parses a public profile page
+        :param name: Name of the profile
+        :param url: Crunchbase URL of the profile
+        :param parser: BeautifulSoup parser
+        :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+        :param priority: Priority of the requests in the scheduler
+        :param fingerprints: Fingerprints of the previous runs, unchanged profiles and sections aren't parsed again
+        :param sections: Names of the sections to parse, None for all of them
+        :param cards: Card types to parse, None for all of them
+        :return: Dictionary of the parsed profile data
+        """
+        async def run():
+            async with self.session() as session:
+                return await self.fetch_profile(session, name=name, url=url, parser=parser, restrict=restrict,
+                                                priority=priority, fingerprints=fingerprints, sections=sections,
+                                                cards=cards)
+
+        return asyncio.run(run())
+
+    async def fetch_profiles(self, urls, results, parser=None, restrict=True, priority=FRESH, fingerprints=None,
+                             sections=None, cards=None):
+        """
+        Fetches and parses the profiles, at most concurrency profiles at the same time
+        :param urls: Iterable of (name, url) tuples
+        :param results: Queue the (name, data) tuples are put in, data is None if the profile couldn't be fetched
+        :param parser: BeautifulSoup parser
+        :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+        :param priority: Priority of the requests in the scheduler
+        :param fingerprints: Fingerprints of the previous runs, unchanged profiles and sections aren't parsed again
+        :param sections: Names of the sections to parse, None for all of them
+        :param cards: Card types to parse, None for all of them
+        :return:
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def run(session, name, url):
+            try:
+                data = await self.fetch_profile(session, name=name, url=url, parser=parser, restrict=restrict,
+                                                priority=priority, fingerprints=fingerprints, sections=sections,
+                                                cards=cards)
+            except Exception:
+                data = None
+
+            # Blocks in a thread when the consumer is behind, so the finished profiles stay bounded
+            try:
+                await loop.run_in_executor(None, results.put, (name, data))
+            finally:
+                semaphore.release()
+
+        async with self.session() as session:
+            tasks = set()
+            try:
+                for name, url in urls:
+                    await semaphore.acquire()
+                    task = asyncio.ensure_future(run(session, name, url))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                if len(tasks) > 0:
+                    await asyncio.gather(*tasks)
+            except asyncio.CancelledError:
+                # The consumer stopped, the profiles being fetched are cancelled before the session is closed
+                pending = list(tasks)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise
+
+    def process_profiles(self, urls=None, parser=None, restrict=True, priority=FRESH, fingerprints=None,
+                         sections=None, cards=None):
+        """
+        Parses many public profile pages concurrently
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :param parser: BeautifulSoup parser
+        :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+        :param priority: Priority of the requests in the scheduler
+        :param fingerprints: Fingerprints of the previous runs, unchanged profiles and sections aren't parsed again
+        :param sections: Names of the sections to parse, None for all of them
+        :param cards: Card types to parse, None for all of them
+        :return: Generator of (name, data) tuples in the order the profiles finish, data is None if fetching failed
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+        if isinstance(urls, dict):
+            urls = urls.items()
+
+        # Runs the event loop in a thread, and hands the profiles over through a bounded queue
+        results = queue.Queue(maxsize=self.concurrency)
+        done = object()
+        errors = list()
+        running = list()
+        stopped = threading.Event()
+
+        async def fetch():
+            # Keeps the loop and the task, so the consumer can cancel the task from its own thread
+            running.append((asyncio.get_running_loop(), asyncio.current_task()))
+            if stopped.is_set():
+                return
+            await self.fetch_profiles(urls, results, parser=parser, restrict=restrict, priority=priority,
+                                      fingerprints=fingerprints, sections=sections, cards=cards)
+
+        def run():
+            try:
+                asyncio.run(fetch())
+            except asyncio.CancelledError:
+                pass
+            except Exception as error:
+                errors.append(error)
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            # Cancels the pending profiles, including when the caller stops iterating early
+            stopped.set()
+            if thread.is_alive() and len(running) > 0:
+                loop, task = running[0]
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    # The loop already closed
+                    pass
+
+            # Discards the unconsumed profiles, so no task stays blocked on a full results queue
+            while thread.is_alive():
+                try:
+                    results.get_nowait()
+                except queue.Empty:
+                    thread.join(timeout=0.1)
+
+        if len(errors) > 0:
+            raise errors[0]
@@ -0,0 +1,146 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+
+__author__ = "Abhinav Thirupathi"
+
+
+def content_digest(soups, pro=False):
+    """
+    Hashes the content the parsers read from HTML subtrees: their text and their links
+    :param soups: Iterable of Beautiful soup objects
+    :param pro: True if the content is parsed as a Pro page, the data of a Pro page differs from the public page
+    :return: Hex digest of the content
+    """
+    digest = hashlib.blake2b(b"pro" if pro else b"public", digest_size=16)
+    for soup in soups:
+        digest.update(soup.get_text("\x1f", strip=True).encode("utf-8"))
+        for link in soup.find_all("a", href=True):
+            digest.update(b"\x1e" + link["href"].encode("utf-8"))
+        digest.update(b"\x1d")
+    return digest.hexdigest()
+
+
+def diff_profiles(old=None, new=None):
+    """
+    Gets the sections of a profile that changed between two runs
+    :param old: Dictionary of the parsed profile data of the previous run, None if the profile is new
+    :param new: Dictionary of the parsed profile data of this run
+    :return: Dictionary with the 'Crunchbase URL', the 'changed' sections and the 'removed' section names, keyed by
+             profile name, or None if nothing changed
+    """
+    old_name, old_data = next(iter(old.items())) if old else (None, dict())
+    name, data = next(iter(new.items()))
+
+    changed = {section: section_data for section, section_data in data.items()
+               if section != "Crunchbase URL" and old_data.get(section) != section_data}
+    removed = [section for section in old_data if section not in data]
+    if old_name == name and len(changed) == 0 and len(removed) == 0:
+        return None
+    return {name: {"Crunchbase URL": data.get("Crunchbase URL"), "changed": changed, "removed": removed}}
+
+
+class Fingerprints:
+    """ Class that represents the content hashes and parsed data of every profile and section of the previous runs"""
+
+    def __init__(self, path=None, summary=False):
+        """
+        Initialize a fingerprint store in an SQLite database
+        :param path: Path of the database, created if it doesn't exist
+        :param summary: If True, the tab pages of a profile whose profile page (the summary of all the tabs) didn't
+                        change aren't visited, else every tab page is visited and only its unchanged sections are reused
+        @attribute connection: SQLite connection to the store
+        """
+        if path is None:
+            raise TypeError("NoneType parameter: 'path'")
+
+        self.path = path
+        self.summary = summary
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS profiles (url TEXT PRIMARY KEY, digest TEXT, data BLOB, "
+                                  "changes BLOB, refreshed REAL)")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS sections (url TEXT, link TEXT, section TEXT, "
+                                  "digest TEXT, data BLOB, PRIMARY KEY (url, link, section))")
+        self.__connection.commit()
+
+    def get_profile(self, url=None):
+        """
+        Gets the fingerprint of a profile page and the profile data parsed with it
+        :param url: Crunchbase URL of the profile
+        :return: (digest, data) tuple, or None if the profile was never recorded
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT digest, data FROM profiles WHERE url = ?", (url,)).fetchone()
+        return (row[0], pickle.loads(row[1])) if row is not None else None
+
+    def record_profile(self, url=None, digest=None, data=None):
+        """
+        Records the fingerprint and the data of a profile, and the changes since the previous record
+        :param url: Crunchbase URL of the profile
+        :param digest: Fingerprint of the profile page
+        :param data: Dictionary of the parsed profile data
+        :return: The changes, see diff_profiles
+        """
+        if url is None:
+            raise TypeError("NoneType parameter: 'url'")
+
+        with self.__lock:
+            with self.__connection:
+                row = self.__connection.execute("SELECT data FROM profiles WHERE url = ?", (url,)).fetchone()
+                changes = diff_profiles(pickle.loads(row[0]) if row is not None else None, data)
+                self.__connection.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                                          (url, digest, pickle.dumps(data), pickle.dumps(changes), time.time()))
+        return changes
+
+    def get_changes(self, url=None):
+        """
+        Gets the changes found the last time the profile was recorded
+        :param url: Crunchbase URL of the profile
+        :return: The changes, see diff_profiles, or None if nothing changed
+        """
+        with self.__lock:
+            row = self.__connection.execute("SELECT changes FROM profiles WHERE url = ?", (url,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def get_page(self, url=None, link=None):
+        """
+        Gets the fingerprints and the parsed data of the sections of a tab page
+        :param url: Crunchbase URL of the profile
+        :param link: Crunchbase URL of the tab page
+        :return: Dictionary of the section names to (digest, data) tuples
+        """
+        with self.__lock:
+            rows = self.__connection.execute("SELECT section, digest, data FROM sections WHERE url = ? AND link = ?",
+                                             (url, link)).fetchall()
+        return {section: (digest, pickle.loads(data)) for section, digest, data in rows}
+
+    def record_page(self, url=None, link=None, sections=None):
+        """
+        Records the fingerprints and the parsed data of the sections of a tab page, replacing the previous ones
+        :param url: Crunchbase URL of the profile
+        :param link: Crunchbase URL of the tab page
+        :param sections: List of (section name, digest, data) tuples
+        :return:
+        """
+        if url is None or link is None or sections is None:
+            raise TypeError("NoneType parameter: 'url', 'link' or 'sections'")
+
+        with self.__lock:
+            with self.__connection:
+                self.__connection.execute("DELETE FROM sections WHERE url = ? AND link = ?", (url, link))
+                self.__connection.executemany("INSERT OR REPLACE INTO sections VALUES (?, ?, ?, ?, ?)",
+                                              [(url, link, section, digest, pickle.dumps(data))
+                                               for section, digest, data in sections])
+
+    def close(self):
+        """
+        Closes the store
+        :return:
+        """
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+__author__ = "Abhinav Thirupathi"
+
+# Origin of the profile URLs, the crawl doesn't leave it
+CRUNCHBASE_URL = "https://www.crunchbase.com"
+
+
+def normalize_url(url):
+    """
+    Gets the canonical form of a Crunchbase URL, so the same profile is only seen once
+    :param url: Crunchbase URL
+    :return: The URL without query, fragment and trailing slash
+    """
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def discover(data):
+    """
+    Finds the profiles linked from a parsed profile (investors, founders, people, ...)
+    :param data: Dictionary of the parsed profile data, as returned by process_profile
+    :return: Generator of (name, url) tuples of the linked profiles, in the order they appear
+    """
+    # The profile's own URL is at the top of its data, the linked profiles are nested in the sections
+    stack = list()
+    for profile_data in data.values():
+        if isinstance(profile_data, dict):
+            stack.extend(reversed(list(profile_data.items())))
+
+    while len(stack) > 0:
+        name, value = stack.pop()
+        if not isinstance(value, dict):
+            continue
+        url = value.get("Crunchbase URL")
+        if isinstance(url, str) and url.startswith(CRUNCHBASE_URL):
+            yield name, normalize_url(url)
+        for key, child in reversed(list(value.items())):
+            if isinstance(child, dict):
+                stack.append((key, child))
+
+
+class Frontier:
+    """ Class that represents the durable breadth-first queue of a crawl, and the on-disk set of every URL it saw"""
+
+    def __init__(self, path=None):
+        """
+        Initialize a crawl frontier stored in an SQLite database
+        :param path: Path of the database, created if it doesn't exist
+        @attribute connection: SQLite connection to the frontier, only the pages being read are kept in memory
+        """
+        if path is None:
+            raise TypeError("NoneType parameter: 'path'")
+
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                  "url TEXT UNIQUE, name TEXT, depth INTEGER, done INTEGER DEFAULT 0)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS urls_pending ON urls (done, depth, id)")
+        self.__connection.commit()
+
+    def add(self, urls=None, depth=0):
+        """
+        Queues the URLs that were never seen, in one transaction
+        :param urls: Iterable of (name, url) tuples
+        :param depth: Number of links between the seeds and these URLs
+        :return: Number of URLs queued
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+
+        rows = [(normalize_url(url), name, depth) for name, url in urls]
+        with self.__lock:
+            with self.__connection:
+                before = self.__connection.total_changes
+                self.__connection.executemany("INSERT OR IGNORE INTO urls (url, name, depth) VALUES (?, ?, ?)", rows)
+                return self.__connection.total_changes - before
+
+    def next(self, limit=100):
+        """
+        Gets the next pending URLs, the shallowest first and in discovery order
+        :param limit: Maximum number of URLs
+        :return: List of (name, url, depth) tuples
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT name, url, depth FROM urls WHERE done = 0 ORDER BY depth, id "
+                                             "LIMIT ?", (limit,)).fetchall()
+
+    def finish(self, urls=None):
+        """
+        Marks URLs as crawled, they stay in the seen set
+        :param urls: Iterable of URLs
+        :return:
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+
+        with self.__lock:
+            with self.__connection:
+                self.__connection.executemany("UPDATE urls SET done = 1 WHERE url = ?",
+                                              [(normalize_url(url),) for url in urls])
+
+    def __contains__(self, url):
+        with self.__lock:
+            row = self.__connection.execute("SELECT 1 FROM urls WHERE url = ?", (normalize_url(url),)).fetchone()
+        return row is not None
+
+    def pending(self):
+        """
+        Gets the number of URLs waiting to be crawled
+        :return: The number of URLs
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM urls WHERE done = 0").fetchone()[0]
+
+    def seen(self):
+        """
+        Gets the number of URLs ever queued
+        :return: The number of URLs
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def close(self):
+        """
+        Closes the frontier
+        :return:
+        """
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,77 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from metrics import NULL_METRICS, byte_size
+
+__author__ = "Abhinav Thirupathi"
+
+# Parser used when none is chosen, the pure-Python parser bundled with Python
+DEFAULT_PARSER = 'html.parser'
+
+# Fast C-backed parsers, in order of preference, used when the 'fast' parser is chosen
+FAST_PARSERS = ['lxml']
+
+# Subtrees of a page that the Section parsers read
+ROW_CARDS = ['row-card']
+SECTION_CARDS = ['section-card']
+
+
+def resolve_parser(parser=None):
+    """
+    Gets the name of an installed BeautifulSoup parser
+    :param parser: Name of the parser ('html.parser', 'lxml', 'html5lib', ...), 'fast' or None for the default
+    :return: The name of the parser
+    """
+    if parser is None:
+        return DEFAULT_PARSER
+
+    # Picks the first installed fast parser, and falls back to the default parser
+    if parser == 'fast':
+        for fast_parser in FAST_PARSERS:
+            if builder_registry.lookup(fast_parser) is not None:
+                return fast_parser
+        return DEFAULT_PARSER
+
+    if builder_registry.lookup(parser) is None:
+        raise ValueError("Parser is not installed: '" + parser + "'")
+    return parser
+
+
+def make_soup(markup, parser=None, only=None, metrics=NULL_METRICS):
+    """
+    Builds the BeautifulSoup object of the HTML content
+    :param markup: HTML content of the page
+    :param parser: Name of the parser, defaults to DEFAULT_PARSER
+    :param only: List of tag names, if not None only the subtrees of those tags are parsed
+    :param metrics: Metrics the duration and size of the parsing are recorded in
+    :return: Beautiful soup object of the HTML content
+    """
+    if parser is None:
+        parser = DEFAULT_PARSER
+
+    with metrics.timer("soup", key=parser) as timer:
+        if metrics.enabled:
+            timer.size = byte_size(markup)
+        if only is None:
+            return BeautifulSoup(markup, parser)
+        return BeautifulSoup(markup, parser, parse_only=SoupStrainer(only))
+
+
+# Script that returns the outer HTML of the n-th element with a tag name, or null if there is no such element
+SNAPSHOT_SCRIPT = "var node = document.getElementsByTagName(arguments[0])[arguments[1]]; " \
+                  "return node ? node.outerHTML : null;"
+
+
+def snapshot(driver, tag, index=0, metrics=NULL_METRICS):
+    """
+    Gets the HTML content of one element of the live page, instead of serializing the whole page
+    :param driver: Selenium driver
+    :param tag: Tag name of the element ('row-card', 'section-card', ...)
+    :param index: Index of the element among the elements with that tag name, in document order
+    :param metrics: Metrics the duration and size of the serialization are recorded in
+    :return: The outer HTML of the element, or None if the driver can't run scripts or there is no such element
+    """
+    with metrics.timer("snapshot", key=tag) as timer:
+        fragment = driver.execute_script(SNAPSHOT_SCRIPT, tag, index)
+        if metrics.enabled:
+            timer.size = byte_size(fragment) if fragment is not None else 0
+    return fragment
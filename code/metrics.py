@@ -0,0 +1,225 @@
+import json
+import logging
+import threading
+import time
+
+__author__ = "Abhinav Thirupathi"
+
+
+class Timer:
+    """ Class that represents a context manager timing one phase of the scraping"""
+
+    def __init__(self, metrics, phase, key=None, details=None):
+        """
+        Initialize a timer
+        :param metrics: Metrics the duration is recorded in
+        :param phase: Name of the phase ('profile', 'tab', 'navigation', 'page_source', 'snapshot', 'soup', 'card', ...)
+        :param key: Key the phase is summarized by, e.g. the card type
+        :param details: Dictionary of extra information for the logs and hooks, e.g. the URL
+        @attribute size: Number of bytes handled in the phase, set inside the with block
+        """
+        self.metrics = metrics
+        self.phase = phase
+        self.key = key
+        self.details = details
+        self.size = None
+        self.__start = None
+
+    def __enter__(self):
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.phase, time.perf_counter() - self.__start, size=self.size, key=self.key,
+                            **(self.details or {}))
+
+
+class NullTimer:
+    """ Class that represents a timer that records nothing, used when the metrics are disabled"""
+
+    size = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class NullMetrics:
+    """ Class that represents disabled metrics, every call does nothing"""
+
+    enabled = False
+    __timer = NullTimer()
+
+    def timer(self, phase, key=None, **details):
+        return self.__timer
+
+    def record(self, phase, seconds, size=None, key=None, **details):
+        pass
+
+
+# Shared disabled metrics, the default of Crunchbase, Profile, Section and Wait
+NULL_METRICS = NullMetrics()
+
+
+class Metrics:
+    """ Class that records the duration and size of every phase of the scraping, and exports a summary"""
+
+    enabled = True
+
+    def __init__(self, logger=None, hooks=None):
+        """
+        Initialize the metrics
+        :param logger: Logger every record is written to as a JSON structured log, None to not log
+        :param hooks: List of functions called with the dictionary of every record
+        @attribute summary: Dictionary of (phase, key) to [count, seconds, min seconds, max seconds, bytes]
+        """
+        self.logger = logger
+        self.hooks = list(hooks) if hooks is not None else list()
+        self.__summary = dict()
+        self.__lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """
+        Adds a function called with the dictionary of every record
+        :param hook: The function
+        :return:
+        """
+        self.hooks.append(hook)
+
+    def timer(self, phase, key=None, **details):
+        """
+        Creates a context manager that records the duration of the phase
+        :param phase: Name of the phase
+        :param key: Key the phase is summarized by
+        :param details: Extra information for the logs and hooks
+        :return: Timer, its size attribute can be set to record the number of bytes
+        """
+        return Timer(self, phase, key=key, details=details)
+
+    def record(self, phase, seconds, size=None, key=None, **details):
+        """
+        Records the duration of a phase
+        :param phase: Name of the phase
+        :param seconds: Duration of the phase
+        :param size: Number of bytes handled in the phase
+        :param key: Key the phase is summarized by
+        :param details: Extra information for the logs and hooks
+        :return:
+        """
+        with self.__lock:
+            summary = self.__summary.get((phase, key))
+            if summary is None:
+                summary = self.__summary[(phase, key)] = [0, 0.0, seconds, seconds, 0]
+            summary[0] += 1
+            summary[1] += seconds
+            summary[2] = min(summary[2], seconds)
+            summary[3] = max(summary[3], seconds)
+            summary[4] += size or 0
+
+        if self.logger is not None or len(self.hooks) > 0:
+            event = dict(details, phase=phase, key=key, seconds=seconds, bytes=size)
+            if self.logger is not None:
+                self.logger.info(json.dumps(event, ensure_ascii=False))
+            for hook in self.hooks:
+                hook(event)
+
+    def summary(self):
+        """
+        Gets the summary of the recorded phases
+        :return: List of dictionaries with the phase, key, count, total, min and max seconds, and bytes
+        """
+        with self.__lock:
+            items = sorted(self.__summary.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        return [{"phase": phase, "key": key, "count": count, "seconds": total, "min_seconds": minimum,
+                 "max_seconds": maximum, "bytes": size}
+                for (phase, key), (count, total, minimum, maximum, size) in items]
+
+    def to_json(self, indent=3):
+        """
+        Exports the summary as JSON
+        :param indent: Indentation of the JSON
+        :return: The JSON string
+        """
+        return json.dumps(self.summary(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefix="crunchbase"):
+        """
+        Exports the summary in the Prometheus text format
+        :param prefix: Prefix of the metric names
+        :return: The Prometheus text
+        """
+        lines = ["# TYPE {}_phase_seconds summary".format(prefix),
+                 "# TYPE {}_phase_bytes_total counter".format(prefix)]
+        for item in self.summary():
+            labels = 'phase="{}"'.format(item["phase"])
+            if item["key"] is not None:
+                labels += ',key="{}"'.format(str(item["key"]).replace("\\", "\\\\").replace('"', '\\"'))
+            lines.append("{}_phase_seconds_sum{{{}}} {}".format(prefix, labels, item["seconds"]))
+            lines.append("{}_phase_seconds_count{{{}}} {}".format(prefix, labels, item["count"]))
+            lines.append("{}_phase_bytes_total{{{}}} {}".format(prefix, labels, item["bytes"]))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """
+        Forgets the recorded phases
+        :return:
+        """
+        with self.__lock:
+            self.__summary = dict()
+
+
+def navigate(driver, url, metrics=NULL_METRICS):
+    """
+    Gets the page at the URL with the driver, and records the duration of the navigation
+    :param driver: Selenium driver
+    :param url: URL of the page
+    :param metrics: Metrics the navigation is recorded in
+    :return:
+    """
+    with metrics.timer("navigation", url=url):
+        driver.get(url)
+
+
+def page_source(driver, metrics=NULL_METRICS):
+    """
+    Gets the HTML content of the current page, and records the duration and size of its serialization
+    :param driver: Selenium driver
+    :param metrics: Metrics the serialization is recorded in
+    :return: The HTML content of the page
+    """
+    with metrics.timer("page_source") as timer:
+        page_content = driver.page_source
+        # Encoding the page costs a copy of it, so its size is only measured when metrics are on
+        if metrics.enabled:
+            timer.size = byte_size(page_content)
+    return page_content
+
+
+def byte_size(content):
+    """
+    Gets the number of bytes of HTML content, as sent over the network
+    :param content: HTML content, str or bytes
+    :return: Number of bytes of the content encoded in UTF-8
+    """
+    return len(content.encode("utf-8")) if isinstance(content, str) else len(content)
+
+
+def structured_logger(name="crunchbase.metrics", path=None):
+    """
+    Creates a logger that writes every record on its own line, or gets the one created before with the same name
+    :param name: Name of the logger
+    :param path: Path of the log file, None for standard error
+    :return: The logger
+    """
+    logger = logging.getLogger(name)
+
+    # A handler per call would write every record once per call
+    if not logger.handlers:
+        handler = logging.FileHandler(path, encoding="utf-8") if path is not None else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
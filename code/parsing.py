@@ -0,0 +1,84 @@
+from profile import Profile, LazyProfile
+from section import Section
+from markup import make_soup, resolve_parser
+
+__author__ = "Abhinav Thirupathi"
+
+# Parse-only entry point: parses stored HTML without a browser, selenium and webdriver_manager are never imported
+
+
+def parse_section(section_content=None, name=None, parser=None, cards=None):
+    """
+    Parses a section from its HTML content
+    :param section_content: HTML content of the row-card (or only the section-card) of the section
+    :param name: Section name, defaults to the title of the row-card
+    :param parser: BeautifulSoup parser ('html.parser', 'lxml', 'fast', ...), defaults to 'html.parser'
+    :param cards: Card types (tag names) to parse, None for all of them
+    :return: Dictionary with the parsed data of the section
+    """
+    if section_content is None:
+        raise TypeError("NoneType parameter: 'section_content'")
+
+    parser = resolve_parser(parser)
+    soup = make_soup(section_content, parser)
+    section_soup = soup.find("section-card")
+    if section_soup is None:
+        raise ValueError("No section-card in the HTML content")
+
+    title = soup.find("h2", {"class": "section-title"})
+    if name is None and title is not None:
+        name = title.text.strip()
+    return Section(name, parser=parser, cards=cards).parse_section(section_soup)
+
+
+def parse_page(page_content=None, parser=None, restrict=True, sections=None, cards=None):
+    """
+    Parses all the sections of a tab page from its HTML content
+    :param page_content: HTML content of the tab page
+    :param parser: BeautifulSoup parser ('html.parser', 'lxml', 'fast', ...), defaults to 'html.parser'
+    :param restrict: If True, only the row-card subtrees of the page are parsed
+    :param sections: Names of the sections to parse, None for all of them
+    :param cards: Card types (tag names) to parse, None for all of them
+    :return: Dictionary with the parsed data of every section, keyed by section name
+    """
+    if page_content is None:
+        raise TypeError("NoneType parameter: 'page_content'")
+
+    profile = Profile(parser=parser, restrict=restrict, sections=sections, cards=cards)
+    return profile.parse_page(page_content)
+
+
+def lazy_profile(url=None, page=None, tabs=None, name=None, parser=None, restrict=True, sections=None, cards=None):
+    """
+    Loads a profile from the HTML content of its pages, its tab pages and sections are parsed when read
+    :param url: Crunchbase URL of the profile
+    :param page: HTML content of the profile page
+    :param tabs: Iterable of the HTML content of the tab pages, in tab order
+    :param name: Name of the profile, replaced by the name on the profile page
+    :param parser: BeautifulSoup parser ('html.parser', 'lxml', 'fast', ...), defaults to 'html.parser'
+    :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+    :param sections: Names of the sections to keep, None for all of them
+    :param cards: Card types (tag names) to parse, None for all of them
+    :return: LazyProfile
+    """
+    if tabs is None:
+        raise TypeError("NoneType parameter: 'tabs'")
+
+    profile = LazyProfile(name, parser=parser, restrict=restrict, sections=sections, cards=cards)
+    profile.load_page(url=url, page_content=page)
+    profile.parse_pages(tabs)
+    return profile
+
+
+def parse_profile(url=None, page=None, tabs=None, name=None, parser=None, restrict=True, sections=None, cards=None):
+    """
+    Parses a profile from the HTML content of its pages, see lazy_profile for the parameters
+    :return: Dictionary of the parsed profile data
+    """
+    if tabs is None:
+        raise TypeError("NoneType parameter: 'tabs'")
+
+    profile = Profile(name, parser=parser, restrict=restrict, sections=sections, cards=cards)
+    profile.load_page(url=url, page_content=page)
+    profile.parse_pages(tabs)
+    return profile.get_data()
@@ -0,0 +1,158 @@
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from parsing import parse_profile
+from pool import DriverPool
+
+__author__ = "Abhinav Thirupathi"
+
+
+def parse_snapshot(snapshot, parser=None, restrict=True, sections=None, cards=None):
+    """
+    Parses a profile from the snapshot of its pages, runs in the worker processes
+    :param snapshot: Dictionary with the 'name', 'url', 'page' (profile page) and 'tabs' (tab pages) of the profile
+    :param parser: BeautifulSoup parser
+    :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+    :param sections: Names of the sections to parse, None for all of them
+    :param cards: Card types to parse, None for all of them
+    :return: Dictionary of the parsed profile data
+    """
+    return parse_profile(url=snapshot['url'], page=snapshot['page'], tabs=snapshot['tabs'], name=snapshot['name'],
+                         parser=parser, restrict=restrict, sections=sections, cards=cards)
+
+
+class Pipeline:
+    """ Class that represents a two-stage pipeline: drivers fetch page snapshots, a process pool parses them"""
+
+    def __init__(self, crunchbase=None, workers=1, processes=None, queue_size=8, ordered=True, retries=2):
+        """
+        Initialize a fetch/parse pipeline
+        :param crunchbase: Crunchbase object whose settings (parser, waits, cache) are used by the fetchers
+        :param workers: Number of drivers fetching snapshots
+        :param processes: Number of processes parsing snapshots, defaults to the number of CPUs
+        :param queue_size: Maximum number of fetched snapshots waiting to be parsed, and of parsed profiles held back for
+        the input order, the fetchers block when it is full
+        :param ordered: If True, profiles are yielded in input order, else as soon as they are parsed
+        :param retries: Number of times a profile is handed to another driver after its driver failed
+        @attribute snapshots: Bounded queue between the fetch stage and the parse stage
+        @attribute stopped: Event set when the consumer stops, so the fetch stage stops fetching
+        """
+        if crunchbase is None:
+            raise TypeError("NoneType parameter: 'crunchbase'")
+        if queue_size < 1:
+            raise ValueError("Queue size must be at least 1")
+
+        self.crunchbase = crunchbase
+        self.workers = workers
+        self.processes = processes
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.retries = retries
+        self.__snapshots = queue.Queue(maxsize=queue_size)
+        self.__stopped = threading.Event()
+
+    def __fetch(self, urls):
+        """
+        Fetches the snapshots of the profiles with a pool of drivers, and puts them in the snapshots queue
+        :param urls: List of ((index, name), url) tuples
+        :return:
+        """
+        pool = DriverPool(factory=lambda: self.crunchbase.new_worker(), size=self.workers, retries=self.retries,
+                          task=lambda crunchbase, key, url, pro: crunchbase.fetch_snapshot(name=key[1], url=url),
+                          backlog=1)
+        results = pool.run(urls=urls)
+        try:
+            for key, snapshot in results:
+                if self.__stopped.is_set():
+                    break
+                self.__snapshots.put((key, snapshot))
+        finally:
+            # Closing the pool's generator stops its drivers
+            results.close()
+            self.__snapshots.put(None)
+
+    def run(self, urls=None):
+        """
+        Processes the profiles through the pipeline
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :return: Generator of (name, data) tuples, data is None if the profile couldn't be fetched or parsed
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+        if isinstance(urls, dict):
+            urls = urls.items()
+
+        # Keys every profile with its input position, to put the parsed profiles back in input order
+        urls = [((index, name), url) for index, (name, url) in enumerate(urls)]
+        self.__stopped.clear()
+        fetcher = threading.Thread(target=self.__fetch, args=(urls,), daemon=True)
+        fetcher.start()
+
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            # Bounds the snapshots being parsed and the profiles held back, so at most queue_size are held at once
+            in_flight = dict()
+            parsed = dict()
+            next_index = 0
+            fetched_all = False
+
+            def room():
+                if len(parsed) + len(in_flight) < self.queue_size:
+                    return True
+                # Past the bound, only pulls until the profile next in order turns up, else nothing could be yielded
+                return self.ordered and next_index not in parsed and \
+                    all(index != next_index for index, _ in in_flight.values())
+
+            try:
+                while not fetched_all or len(in_flight) > 0:
+                    # Moves fetched snapshots to the process pool while there is room
+                    while not fetched_all and room():
+                        try:
+                            item = self.__snapshots.get(block=len(in_flight) == 0)
+                        except queue.Empty:
+                            break
+                        if item is None:
+                            fetched_all = True
+                            break
+                        (index, name), snapshot = item
+                        if snapshot is None:
+                            parsed[index] = (name, None)
+                            continue
+                        future = executor.submit(parse_snapshot, snapshot, self.crunchbase.parser,
+                                                 self.crunchbase.restrict, self.crunchbase.sections,
+                                                 self.crunchbase.cards)
+                        in_flight[future] = (index, name)
+
+                    if len(in_flight) > 0:
+                        done, _ = wait(list(in_flight), timeout=0.05, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            index, name = in_flight.pop(future)
+                            try:
+                                parsed[index] = (name, future.result())
+                            except Exception:
+                                parsed[index] = (name, None)
+
+                    # Yields the parsed profiles, holding back the ones that finished ahead of their turn when ordered
+                    if self.ordered:
+                        while next_index in parsed:
+                            yield parsed.pop(next_index)
+                            next_index += 1
+                    else:
+                        for index in list(parsed):
+                            yield parsed.pop(index)
+
+                for index in sorted(parsed):
+                    yield parsed.pop(index)
+            finally:
+                # Stops the fetch stage, including when the caller stops iterating early
+                self.__stopped.set()
+                for future in in_flight:
+                    future.cancel()
+
+                # Discards the unparsed snapshots, so the fetch stage doesn't stay blocked on a full snapshots queue
+                while fetcher.is_alive():
+                    try:
+                        self.__snapshots.get_nowait()
+                    except queue.Empty:
+                        fetcher.join(timeout=0.1)
+                while not self.__snapshots.empty():
+                    self.__snapshots.get_nowait()
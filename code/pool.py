@@ -0,0 +1,112 @@
+import queue
+import threading
+
+__author__ = "Abhinav Thirupathi"
+
+
+class DriverPool:
+    """ Class that represents a pool of independent Crunchbase scrapers, each with its own selenium driver"""
+
+    def __init__(self, factory=None, size=1, retries=2, task=None, backlog=0):
+        """
+        Initialize a pool of scrapers
+        :param factory: Function that returns a new Crunchbase object ready to process profiles
+        :param size: Number of scrapers (drivers) in the pool
+        :param retries: Number of times a profile is handed to another scraper after a failure
+        :param task: Function called as task(crunchbase, name, url, pro) for every profile, defaults to process_profile
+        :param backlog: Maximum number of finished profiles waiting to be consumed, 0 for no limit
+        @attribute jobs: Queue of (name, url, attempt) tuples waiting to be processed
+        @attribute results: Queue of (name, data) tuples of the processed profiles
+        """
+        if factory is None:
+            raise TypeError("NoneType parameter: 'factory'")
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.factory = factory
+        self.size = size
+        self.retries = retries
+        self.task = task if task is not None else lambda crunchbase, name, url, pro: crunchbase.process_profile(
+            pro=pro, name=name, url=url)
+        self.__jobs = queue.Queue()
+        self.__results = queue.Queue(maxsize=backlog)
+
+    def __worker(self, pro):
+        """
+        Processes profiles from the jobs queue until a None job is received
+        :param pro: If the logged into Crunchbase Pro its True, else False
+        :return:
+        """
+        crunchbase = None
+        while True:
+            job = self.__jobs.get()
+            if job is None:
+                break
+            name, url, attempt = job
+
+            try:
+                # Starts a new scraper when the worker doesn't have a healthy one
+                if crunchbase is None:
+                    crunchbase = self.factory()
+                data = self.task(crunchbase, name, url, pro)
+                self.__results.put((name, data))
+            except Exception:
+                # Drops the failed driver, the worker starts a new one for its next profile
+                if crunchbase is not None:
+                    crunchbase.quit()
+                    crunchbase = None
+
+                # Hands the profile back to the queue so a healthy scraper picks it up
+                if attempt < self.retries:
+                    self.__jobs.put((name, url, attempt + 1))
+                else:
+                    self.__results.put((name, None))
+
+        # Keeps the healthy driver warm for the next run
+        if crunchbase is not None:
+            crunchbase.quit(release=True)
+
+    def run(self, urls=None, pro=False):
+        """
+        Processes the profiles with all the scrapers in the pool
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :param pro: If the logged into Crunchbase Pro its True, else False
+        :return: Generator of (name, data) tuples in the order the profiles finish, data is None if every attempt failed
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+        if isinstance(urls, dict):
+            urls = urls.items()
+
+        pending = 0
+        for name, url in urls:
+            self.__jobs.put((name, url, 0))
+            pending += 1
+
+        threads = [threading.Thread(target=self.__worker, args=(pro,), daemon=True)
+                   for _ in range(min(self.size, max(pending, 1)))]
+        for thread in threads:
+            thread.start()
+
+        try:
+            # Yields every profile as soon as any scraper finishes it
+            while pending > 0:
+                yield self.__results.get()
+                pending -= 1
+        finally:
+            # Stops the workers, including when the caller stops iterating early
+            while True:
+                try:
+                    self.__jobs.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in threads:
+                self.__jobs.put(None)
+
+            # Discards the unconsumed results, so no worker stays blocked on a full results queue
+            for thread in threads:
+                while thread.is_alive():
+                    try:
+                        self.__results.get_nowait()
+                    except queue.Empty:
+                        thread.join(timeout=0.1)
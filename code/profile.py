@@ -1,6 +1,10 @@
-import time
-from bs4 import BeautifulSoup
 from section import Section
+from wait import Wait
+from markup import make_soup, resolve_parser, ROW_CARDS
+from metrics import NULL_METRICS, navigate, page_source
+from windows import open_windows, enter_window, close_window
+from scheduler import NULL_SCHEDULER, FRESH, paced
+from fingerprint import content_digest
 
 __author__ = "Abhinav Thirupathi"
 
@@ -8,18 +12,48 @@ __author__ = "Abhinav Thirupathi"
 class Profile:
     """ Class that represents a Crunchbase profile"""
 
-    def __init__(self, name=None):
+    def __init__(self, name=None, wait=None, parser=None, restrict=True, checkpoint=None, metrics=NULL_METRICS,
+                 windows=1, scheduler=NULL_SCHEDULER, priority=FRESH, fingerprints=None, sections=None, cards=None):
         """
         Initialize a Crunchbase profile object
         :param name: Profile name
+        :param wait: Wait engine used after every navigation, defaults to a new Wait
+        :param parser: BeautifulSoup parser ('html.parser', 'lxml', 'fast', ...), defaults to 'html.parser'
+        :param restrict: If True, only the row-card subtrees of the tab pages are parsed
+        :param checkpoint: Checkpoint journal that records every finished tab page
+        :param metrics: Metrics the tab pages, navigations, page parsing and card parsers are recorded in
+        :param windows: Number of browser windows the tab pages (and more-results pages) are loaded in at the same time
+        :param scheduler: Scheduler that paces the navigations, shared with the other drivers
+        :param priority: Priority of the navigations in the scheduler, lower values are sent first
+        :param fingerprints: Fingerprints of the previous runs, the unchanged sections (or profiles) aren't parsed again
+        :param sections: Names of the sections to parse, None for all of them; the other sections are skipped with
+                         their clicks and navigations
+        :param cards: Card types (tag names) to parse, None for all of them, see Section
         @attribute soup: Beautiful soup object of the HTML content of the webpage
         @attribute data: The parsed data of the profile's Crunchbase page
         @attribute url: Crunchbase URL of the profile
+        @attribute page: HTML content of the profile page
         """
         self.name = name
         self.__soup = None
         self.__data = None
         self.__url = None
+        self.__page = None
+        self.wait = wait if wait is not None else Wait()
+        self.parser = resolve_parser(parser)
+        self.restrict = restrict
+        self.checkpoint = checkpoint
+        self.metrics = metrics
+        self.windows = windows
+        self.scheduler = scheduler
+        self.priority = priority
+        self.fingerprints = fingerprints
+        self.sections = sections
+        self.cards = cards
+
+        # Fingerprints hold whole profiles, a partial profile would be taken for a changed (or unchanged) one
+        if fingerprints is not None and (sections is not None or cards is not None):
+            raise ValueError("Fingerprints can't be used with a sections or cards allowlist")
 
     def get_data(self):
         """
@@ -28,53 +62,283 @@ class Profile:
         """
         return self.__data
 
-    def parse_profile(self, pro, driver):
+    def get_page(self):
         """
-        Parses the Crunchbase profile page
-        :return:
+        Gets the HTML content of the profile page
+        :return: The HTML content of the profile page
+        """
+        return self.__page
+
+    def get_tab_links(self):
+        """
+        Gets the links in the tabs of the profile page
+        :return: List of the Crunchbase URLs of the tabs
         """
         # Finds all the links on the Pro page
         tab = self.__soup.find("div", {"class": "mat-tab-links"})
         tab_links = tab.find_all("a")
-        tab_links_lst = ["https://www.crunchbase.com" + tab_link['href'] for tab_link in tab_links]
+        return ["https://www.crunchbase.com" + tab_link['href'] for tab_link in tab_links]
+
+    def fetch_page(self, link, driver):
+        """
+        Gets the HTML content of a tab of the profile page
+        :param link: Crunchbase URL of the tab
+        :param driver: Selenium driver
+        :return: The HTML content of the tab page
+        """
+        with paced(self.scheduler, driver).slot(link, self.priority) as slot:
+            navigate(driver, link, self.metrics)
+            slot.ok = self.wait.row_cards(driver)
+        return self.read_page(driver)
+
+    def read_page(self, driver):
+        """
+        Gets the HTML content of the tab page the driver is on, after its sections are loaded
+        :param driver: Selenium driver
+        :return: The HTML content of the tab page
+        """
+        # Expands the description of the profile in the summary
+        try:
+            readMoreButton = driver.find_element_by_xpath("//a[@aria-label='Read More']")
+            if readMoreButton is not None:
+                readMoreButton.click()
+                self.wait.settled(driver, timeout=2)
+        except:
+            pass
+
+        return page_source(driver, self.metrics)
+
+    def fetch_pages(self, driver):
+        """
+        Gets the HTML content of every tab of the profile page
+        :param driver: Selenium driver
+        :return: Generator of the HTML content of the tab pages, each page is fetched when the previous one is consumed
+        """
+        # Iterates through every link in the tab links
+        for link in self.get_tab_links():
+            yield self.fetch_page(link, driver)
+
+    def parse_page(self, page_content, pro=False, driver=None, link=None):
+        """
+        Parses all the sections of a tab page
+        :param page_content: HTML content of the tab page
+        :param pro: True if the profile page is pro, else False
+        :param driver: Selenium driver on the tab page, needed for the Pro cards
+        :param link: Crunchbase URL of the tab page, the sections are fingerprinted under it
+        :return: Dictionary with the parsed data of every section, keyed by section name
+        """
+        page_data = dict()
+        for section_name, section_data in self.parse_sections(self.find_sections(page_content), pro=pro, driver=driver,
+                                                              link=link):
+            if len(section_data) > 0:
+                page_data[section_name] = section_data
+        return page_data
+
+    def find_sections(self, page_content):
+        """
+        Finds the sections (row-cards) of a tab page that are in the allowlist
+        :param page_content: HTML content of the tab page
+        :return: List of (index of the row-card on the page, section name, Beautiful soup object) tuples
+        """
+        soup = make_soup(page_content, self.parser, only=ROW_CARDS if self.restrict else None, metrics=self.metrics)
+        sections = list()
+        for row_card_index, row_card in enumerate(soup.find_all("row-card")):
+            section_name = row_card.find("h2", {"class": "section-title"}).text.strip()
+            if self.sections is None or section_name in self.sections:
+                sections.append((row_card_index, section_name, row_card))
+        return sections
+
+    def parse_sections(self, sections, pro=False, driver=None, link=None):
+        """
+        Parses sections of a tab page
+        :param sections: List of the tuples returned by find_sections
+        :param pro: True if the profile page is pro, else False
+        :param driver: Selenium driver on the tab page, needed for the Pro cards
+        :param link: Crunchbase URL of the tab page, the sections are fingerprinted under it
+        :return: List of (section name, parsed data) tuples, in the order of the sections
+        """
+        # Reuses the data of the sections whose content didn't change since the previous run, without their clicks
+        digests = [None] * len(sections)
+        previous = dict()
+        if self.fingerprints is not None and link is not None:
+            digests = [content_digest([row_card], pro) for _, _, row_card in sections]
+            previous = self.fingerprints.get_page(self.__url, link)
+        unchanged = [digest is not None and previous.get(section_name, (None,))[0] == digest
+                     for (_, section_name, _), digest in zip(sections, digests)]
+
+        # Opens the more-results pages of the sections in other windows, so the browser loads them at the same time
+        windows = self.open_more_results([row_card for (_, _, row_card), same in zip(sections, unchanged) if not same],
+                                         pro, driver)
+        origin = driver.current_window_handle if len(windows) > 0 else None
+
+        sections_data = list()
+        try:
+            # Iterates through every section on the page and parses it
+            for position, (row_card_index, section_name, row_card) in enumerate(sections):
+                if unchanged[position]:
+                    section_data = previous[section_name][1]
+                else:
+                    section_soup = row_card.find("section-card")
+                    section = Section(section_name, wait=self.wait, parser=self.parser, restrict=self.restrict,
+                                      metrics=self.metrics, windows=windows, scheduler=self.scheduler,
+                                      priority=self.priority, cards=self.cards)
+                    section_data = section.parse_section(section_soup, driver, row_card_index, pro=pro)
+                sections_data.append((section_name, section_data))
+        finally:
+            # Closes the windows the sections didn't use
+            for handle in windows.values():
+                close_window(driver, handle, origin)
+
+        if self.fingerprints is not None and link is not None:
+            self.fingerprints.record_page(self.__url, link, [(section_name, digest, section_data) for
+                                                             (section_name, section_data), digest in
+                                                             zip(sections_data, digests)])
+        return sections_data
+
+    def use_windows(self, driver):
+        """
+        Checks if pages can be loaded in other windows of the driver
+        :param driver: Selenium driver
+        :return: True if more than one window is allowed and the driver is a live browser, else False
+        """
+        return self.windows > 1 and driver is not None and not getattr(driver, 'static', False)
+
+    def open_more_results(self, row_cards, pro, driver):
+        """
+        Opens the more-results pages the Pro sections of a tab page navigate to, each in a new window
+        :param row_cards: List of the Beautiful soup objects of the sections (row-cards) of the page
+        :param pro: True if the profile page is pro, else False
+        :param driver: Selenium driver
+        :return: Dictionary of the more-results links to their window handles
+        """
+        if pro is False or not self.use_windows(driver):
+            return dict()
 
+        links = list()
+        for row_card in row_cards:
+            link = Section.more_results_link(row_card.find("section-card"), self.cards)
+            if link is not None and link not in links:
+                links.append(link)
+
+        # Even a single page saves going back to the tab page, the pages after the first windows are navigated to
+        links = links[:self.windows]
+        return dict(zip(links, open_windows(driver, links, self.scheduler, self.priority)))
+
+    def parse_pages(self, pages, pro=False, driver=None):
+        """
+        Parses the profile from the HTML content of its tab pages
+        :param pages: Iterable of the HTML content of the tab pages, in tab order
+        :param pro: True if the profile page is pro, else False
+        :param driver: Selenium driver, needed for the Pro cards
+        :return:
+        """
+        self.set_pages_data((self.parse_page(page_content, pro=pro, driver=driver, link=link)
+                             for page_content, link in zip(pages, self.get_tab_links())), pro=pro)
+
+    def set_pages_data(self, pages_data, pro=False):
+        """
+        Sets the data attribute from the parsed sections of the tab pages
+        :param pages_data: Iterable of the dictionaries returned by parse_page, in tab order
+        :param pro: True if the profile page is pro, else False
+        :return:
+        """
         # Dictionary to store parsed data from all the sections
         profile_data = dict()
         self.name = self.__soup.find("h1").text.strip()
         profile_data[self.name] = dict()
         profile_data[self.name]["Crunchbase URL"] = self.__url
 
-        # Iterates through every link in the tab links
-        for link in tab_links_lst:
-            driver.get(link)
-            time.sleep(3)
-
-            # Expands the description of the profile in the summary
-            try:
-                readMoreButton = driver.find_element_by_xpath("//a[@aria-label='Read More']")
-                if readMoreButton is not None:
-                    readMoreButton.click()
-                    time.sleep(0.2)
-            except:
-                pass
-
-            page_content = driver.page_source
-            soup = BeautifulSoup(page_content, 'html.parser')
-
-            # Finds all the sections (row-cards) on the page
-            row_cards = soup.find_all("row-card")
-
-            # Iterates through every section on the page, parses it, and stores it in the dictionary
-            for row_card_index, row_card in enumerate(row_cards):
-                section_soup = row_card.find("section-card")
-                section_name = row_card.find("h2", {"class": "section-title"}).text.strip()
-                section = Section(section_name)
-                section_data = section.parse_section(section_soup, driver, row_card_index, pro=pro)
-                if len(section_data) > 0:
-                    profile_data[self.name][section_name] = section_data
+        for page_data in pages_data:
+            profile_data[self.name].update(page_data)
 
         # Sets data attribute equal to the  dictionary with the parsed data
         self.__data = profile_data
+        if self.fingerprints is not None:
+            self.fingerprints.record_profile(self.__url, self.fingerprint(pro), profile_data)
+
+    def fingerprint(self, pro=False):
+        """
+        Hashes the sections and the tab links of the profile page, the summary of all the tab pages
+        :param pro: True if the profile page is pro, else False
+        :return: Hex digest of the profile page
+        """
+        soups = self.__soup.find_all("row-card")
+        tab = self.__soup.find("div", {"class": "mat-tab-links"})
+        if tab is not None:
+            soups.append(tab)
+        return content_digest(soups, pro)
+
+    def reuse(self, pro=False):
+        """
+        Sets the data attribute from the previous run when the profile page didn't change, so no tab page is visited
+        :param pro: True if the profile page is pro, else False
+        :return: True if the data of the previous run was reused, else False
+        """
+        if self.fingerprints is None or self.fingerprints.summary is False:
+            return False
+
+        digest = self.fingerprint(pro)
+        previous = self.fingerprints.get_profile(self.__url)
+        if previous is None or previous[0] != digest:
+            return False
+
+        self.__data = previous[1]
+        self.name = next(iter(self.__data))
+        self.fingerprints.record_profile(self.__url, digest, self.__data)
+        return True
+
+    def parse_profile(self, pro, driver):
+        """
+        Parses the Crunchbase profile page
+        :return:
+        """
+        # Parses every tab page while the driver is still on it
+        self.set_pages_data(self.parse_tabs(pro=pro, driver=driver), pro=pro)
+
+    def parse_tabs(self, pro, driver):
+        """
+        Parses every tab page, skipping the tab pages already finished in the checkpoint
+        :param pro: True if the profile page is pro, else False
+        :param driver: Selenium driver
+        :return: Generator of the dictionaries with the parsed sections of every tab page, in tab order
+        """
+        links = self.get_tab_links()
+        batch_size = self.windows if self.use_windows(driver) else 1
+
+        # Loads a batch of tab pages in their own windows at the same time, and parses them in tab order
+        for batch_start in range(0, len(links), batch_size):
+            batch = links[batch_start:batch_start + batch_size]
+            pages_data = {link: self.checkpoint.get_tab(self.__url, link) if self.checkpoint is not None else None
+                          for link in batch}
+            pending = [link for link in batch if pages_data[link] is None]
+            windows = dict(zip(pending, open_windows(driver, pending, self.scheduler, self.priority))) \
+                if len(pending) > 1 else dict()
+            origin = driver.current_window_handle if len(windows) > 0 else None
+
+            try:
+                for link in batch:
+                    page_data = pages_data[link]
+
+                    if page_data is None:
+                        with self.metrics.timer("tab", url=link):
+                            handle = windows.get(link)
+                            if handle is not None:
+                                enter_window(driver, handle, link)
+                                self.scheduler.report(link, self.wait.row_cards(driver))
+                                page_data = self.parse_page(self.read_page(driver), pro=pro, driver=driver,
+                                                            link=link)
+                                close_window(driver, windows.pop(link), origin)
+                            else:
+                                page_data = self.parse_page(self.fetch_page(link, driver), pro=pro, driver=driver,
+                                                            link=link)
+                        if self.checkpoint is not None:
+                            self.checkpoint.finish_tab(self.__url, link, page_data)
+
+                    yield page_data
+            finally:
+                # Closes the windows of the tab pages that weren't parsed
+                for handle in windows.values():
+                    close_window(driver, handle, origin)
 
     def process_profile(self, pro=False, driver=None):
         """
@@ -103,11 +367,198 @@ class Profile:
         if url is not None:
             self.__url = url
             if driver is not None:
-                driver.get(url)
-                time.sleep(3)
-                self.__soup = BeautifulSoup(driver.page_source, 'html.parser')
+                with paced(self.scheduler, driver).slot(url, self.priority) as slot:
+                    navigate(driver, url, self.metrics)
+                    slot.ok = self.wait.row_cards(driver)
+                self.load_page(url=url, page_content=page_source(driver, self.metrics))
                 return driver
             elif driver is None:
                 raise TypeError("NoneType parameter: 'driver'")
         else:
             raise TypeError("NoneType parameter: 'url'")
+
+    def load_page(self, url=None, page_content=None):
+        """
+        Sets the profile page from its HTML content, without a selenium driver
+        :param url: The crunchbase URL
+        :param page_content: HTML content of the profile page
+        :return:
+        """
+        if url is None or page_content is None:
+            raise TypeError("NoneType parameter: 'url' or 'page_content'")
+
+        self.__url = url
+        self.__page = page_content
+        self.__soup = make_soup(page_content, self.parser, metrics=self.metrics)
+
+
+class LazySection:
+    """ Class that represents a section of a tab page whose cards are parsed the first time it is read"""
+
+    __slots__ = ("name", "index", "pro", "row_card", "data")
+
+    def __init__(self, name=None, index=None, pro=False, row_card=None, data=None):
+        """
+        Initialize a lazy section
+        :param name: Section name
+        :param index: Index of the row-card of the section on its tab page
+        :param pro: True if the section is from a Pro page, else False
+        :param row_card: Beautiful soup object of the row-card, None once it is parsed
+        :param data: Dictionary with the parsed data of the section, None until it is parsed
+        """
+        self.name = name
+        self.index = index
+        self.pro = pro
+        self.row_card = row_card
+        self.data = data
+
+    def __getstate__(self):
+        # A checkpoint pickles the section, its row-card is kept as HTML content
+        row_card = str(self.row_card) if self.row_card is not None and self.data is None else None
+        return self.name, self.index, self.pro, row_card, self.data
+
+    def __setstate__(self, state):
+        self.name, self.index, self.pro, self.row_card, self.data = state
+
+
+class LazyPage:
+    """ Class that represents a tab page kept as HTML until one of its sections is read"""
+
+    __slots__ = ("content", "pro", "sections")
+
+    def __init__(self, content=None, pro=False, sections=None):
+        """
+        Initialize a lazy tab page
+        :param content: HTML content of the tab page, None once its sections are found
+        :param pro: True if the tab page is a Pro page, else False
+        :param sections: List of LazySection, None until the tab page is parsed
+        """
+        self.content = content
+        self.pro = pro
+        self.sections = sections
+
+
+class LazyProfile(Profile):
+    """ Class that represents a Crunchbase profile whose tab pages and sections are parsed when they are read"""
+
+    def __init__(self, name=None, wait=None, parser=None, restrict=True, checkpoint=None, metrics=NULL_METRICS,
+                 windows=1, scheduler=NULL_SCHEDULER, priority=FRESH, sections=None, cards=None):
+        """
+        Initialize a lazy Crunchbase profile object, see Profile for the parameters
+        @attribute pages: LazyPage of every tab page, in tab order
+        @attribute data: The parsed data of the whole profile, once get_data parsed every section
+        """
+        Profile.__init__(self, name, wait=wait, parser=parser, restrict=restrict, checkpoint=checkpoint,
+                         metrics=metrics, windows=windows, scheduler=scheduler, priority=priority, sections=sections,
+                         cards=cards)
+        self.__pages = list()
+        self.__data = None
+
+    def parse_page(self, page_content, pro=False, driver=None, link=None):
+        """
+        Keeps a tab page as HTML; on a Pro page with a driver, the sections that click or navigate are parsed right
+        away, and the cards of the other sections are parsed when they are read
+        :param page_content: HTML content of the tab page
+        :param pro: True if the profile page is pro, else False
+        :param driver: Selenium driver on the tab page, needed for the Pro cards
+        :param link: Crunchbase URL of the tab page
+        :return: LazyPage
+        """
+        if pro is False or driver is None:
+            return LazyPage(page_content, pro)
+
+        # The driver moves on to the next tab page, the sections that need it are parsed while it is on this page
+        sections = self.find_sections(page_content)
+        live = [section for section in sections if Section.interactive(section[2].find("section-card"), self.cards)]
+        live_data = dict(zip([section[0] for section in live],
+                             [section_data for _, section_data in self.parse_sections(live, pro=pro, driver=driver,
+                                                                                        link=link)]))
+
+        return LazyPage(pro=pro, sections=[LazySection(section_name, row_card_index, pro,
+                                                       data=live_data[row_card_index])
+                                           if row_card_index in live_data else
+                                           LazySection(section_name, row_card_index, pro, row_card=row_card)
+                                           for row_card_index, section_name, row_card in sections])
+
+    def set_pages_data(self, pages_data, pro=False):
+        """
+        Keeps the tab pages, without parsing them
+        :param pages_data: Iterable of the LazyPage returned by parse_page, in tab order
+        :param pro: True if the profile page is pro, else False
+        :return:
+        """
+        self.__pages = list()
+        for page_data in pages_data:
+            # Tab pages finished by a Profile in the checkpoint are already parsed
+            if isinstance(page_data, dict):
+                page_data = LazyPage(pro=pro, sections=[LazySection(section_name, pro=pro, data=section_data)
+                                                        for section_name, section_data in page_data.items()])
+            self.__pages.append(page_data)
+        self.__data = None
+        Profile.set_pages_data(self, [], pro=pro)
+
+    def page_sections(self, page):
+        """
+        Gets the sections of a lazy tab page, finding them the first time (without parsing their cards)
+        :param page: LazyPage
+        :return: List of LazySection, in the order of the sections
+        """
+        if page.sections is None:
+            page.sections = [LazySection(section_name, row_card_index, page.pro, row_card=row_card)
+                             for row_card_index, section_name, row_card in self.find_sections(page.content)]
+            page.content = None
+        return page.sections
+
+    def section_names(self):
+        """
+        Gets the names of the sections of the profile, finding the sections of the tab pages without parsing them
+        :return: List of the section names, in the order they first appear
+        """
+        return list(dict.fromkeys(entry.name for page in self.__pages for entry in self.page_sections(page)))
+
+    def section(self, name=None):
+        """
+        Gets the parsed data of a section, parsing it the first time it is read
+        :param name: Section name
+        :return: Dictionary with the parsed data of the section, or None if the profile has no such section (or it is
+                 empty)
+        """
+        # A section found on many tab pages keeps its data from the last tab page it isn't empty on, like get_data
+        for page in reversed(self.__pages):
+            for entry in reversed(self.page_sections(page)):
+                if entry.name == name:
+                    section_data = self.parse_entry(entry)
+                    if len(section_data) > 0:
+                        return section_data
+        return None
+
+    def parse_entry(self, entry):
+        """
+        Parses a lazy section, once
+        :param entry: LazySection
+        :return: Dictionary with the parsed data of the section
+        """
+        if entry.data is None:
+            row_card = entry.row_card
+            if isinstance(row_card, str):
+                row_card = make_soup(row_card, self.parser, metrics=self.metrics).find("row-card")
+            section = Section(entry.name, wait=self.wait, parser=self.parser, restrict=self.restrict,
+                              metrics=self.metrics, scheduler=self.scheduler, priority=self.priority, cards=self.cards)
+            entry.data = section.parse_section(row_card.find("section-card"), None, entry.index, pro=entry.pro)
+            entry.row_card = None
+        return entry.data
+
+    def get_data(self):
+        """
+        Gets the parsed data of the whole profile, parsing the tab pages and sections that weren't read yet
+        :return: The parsed data, like Profile.get_data
+        """
+        if self.__data is None and Profile.get_data(self) is not None:
+            profile_data = {self.name: dict(Profile.get_data(self)[self.name])}
+            for page in self.__pages:
+                for entry in self.page_sections(page):
+                    section_data = self.parse_entry(entry)
+                    if len(section_data) > 0:
+                        profile_data[self.name][entry.name] = section_data
+            self.__data = profile_data
+        return self.__data
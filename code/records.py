@@ -0,0 +1,346 @@
+import os
+import re
+import sys
+
+from sink import read_jsonl
+
+__author__ = "Abhinav Thirupathi"
+
+# Sections whose rows are funding rounds, and sections whose rows (or keys) are people
+FUNDING_SECTIONS = ("Funding Rounds",)
+PEOPLE_SECTIONS = ("Current Team", "Board Member and Advisor Profiles", "Current Advisors", "Alumni")
+
+# Keys of a funding round row to the FundingRound attributes
+FUNDING_ROUND_KEYS = {
+    "Announced Date": "announced_date",
+    "Transaction Name": "transaction_name",
+    "Number of Investors": "number_of_investors",
+    "Money Raised": "money_raised",
+    "Lead Investors": "lead_investors",
+}
+
+# Values up to this length are interned too, the short ones (dates, types, titles, amounts) repeat across profiles
+INTERN_LENGTH = 32
+
+# Amounts like '$152.5M', '€3B' or '¥500,000'
+AMOUNT_PATTERN = re.compile(r"([\d,]+(?:\.\d+)?)\s*([KMB]?)\b")
+AMOUNT_UNITS = {"": 1, "K": 10 ** 3, "M": 10 ** 6, "B": 10 ** 9}
+
+
+def intern_key(key):
+    """
+    Gets the shared copy of a key, every profile then points to the same label strings
+    :param key: Dictionary key of the parsed data, row indices are strings after a JSON round trip
+    :return: The interned string, or the row index as an int
+    """
+    if isinstance(key, str):
+        return int(key) if key.isdigit() else sys.intern(key)
+    return key
+
+
+def compact(value):
+    """
+    Converts parsed data to its compact form: interned keys and short values, and tuples instead of the dictionaries
+    keyed by row index (parse_list_card, parse_timeline_card, parse_hub_list_card, ...)
+    :param value: Parsed data of a section, card or row
+    :return: The compact data
+    """
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) <= INTERN_LENGTH else value
+    if not isinstance(value, dict):
+        return value
+
+    keys = [intern_key(key) for key in value]
+    if len(keys) > 0 and keys == list(range(len(keys))):
+        return tuple(compact(child) for child in value.values())
+    return {key: compact(child) for key, child in zip(keys, value.values())}
+
+
+def parse_amount(text=None):
+    """
+    Reads the number of an amount of money, whatever its currency
+    :param text: Amount as shown on Crunchbase, e.g. '$152.5M'
+    :return: The amount as a float, or None if the text isn't an amount
+    """
+    if not isinstance(text, str):
+        return None
+    match = AMOUNT_PATTERN.search(text)
+    if match is None:
+        return None
+    return round(float(match.group(1).replace(",", "")) * AMOUNT_UNITS[match.group(2)], 2)
+
+
+def rows(section_data):
+    """
+    Gets the rows of a section, without its summary
+    :param section_data: Compact data of the section
+    :return: List of (key, row) tuples, the key is the row index or the name of the row
+    """
+    if isinstance(section_data, tuple):
+        return list(enumerate(section_data))
+    if isinstance(section_data, dict):
+        return [(key, row) for key, row in section_data.items() if key != "Summary"]
+    return list()
+
+
+def fields(section_data):
+    """
+    Gets the label/value fields of a section (fields-card, big-values-card, image-with-fields-card, ...)
+    :param section_data: Data of the section
+    :return: List of (label, value) tuples, empty if the section isn't a label/value section
+    """
+    if isinstance(section_data, dict) and all(isinstance(value, str) for value in section_data.values()):
+        return list(section_data.items())
+    return list()
+
+
+class FundingRound:
+    """ Class that represents a funding round of an organization"""
+
+    __slots__ = ("announced_date", "transaction_name", "number_of_investors", "money_raised", "lead_investors")
+
+    def __init__(self, announced_date=None, transaction_name=None, number_of_investors=None, money_raised=None,
+                 lead_investors=None):
+        """
+        Initialize a funding round, the values are kept as shown on Crunchbase
+        :param announced_date: Date the round was announced
+        :param transaction_name: Name of the round, e.g. 'Series B - Acme Robotics'
+        :param number_of_investors: Number of investors of the round
+        :param money_raised: Amount raised, e.g. '$100M'
+        :param lead_investors: Names of the lead investors
+        """
+        self.announced_date = announced_date
+        self.transaction_name = transaction_name
+        self.number_of_investors = number_of_investors
+        self.money_raised = money_raised
+        self.lead_investors = lead_investors
+
+    @property
+    def amount(self):
+        return parse_amount(self.money_raised)
+
+    @property
+    def funding_type(self):
+        """
+        Gets the type of the round, the part of the transaction name before the organization name
+        :return: The type, e.g. 'Series B', or None
+        """
+        if self.transaction_name is None:
+            return None
+        return sys.intern(self.transaction_name.split(" - ")[0].strip())
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Creates a funding round from a row of a funding rounds section
+        :param row: Dictionary of the row, keyed by the column labels
+        :return: FundingRound, or None if the row isn't a funding round
+        """
+        if not isinstance(row, dict) or "Transaction Name" not in row:
+            return None
+        return cls(**{attribute: row.get(key) for key, attribute in FUNDING_ROUND_KEYS.items()})
+
+    def __repr__(self):
+        return "FundingRound(" + repr(self.transaction_name) + ", " + repr(self.money_raised) + ")"
+
+
+class Person:
+    """ Class that represents a person listed in a section of a profile"""
+
+    __slots__ = ("name", "url", "titles", "section")
+
+    def __init__(self, name=None, url=None, titles=(), section=None):
+        """
+        Initialize a person
+        :param name: Name of the person
+        :param url: Crunchbase URL of the person, None if not shown
+        :param titles: Tuple of the titles (role, position, ...)
+        :param section: Name of the section the person is listed in
+        """
+        self.name = name
+        self.url = url
+        self.titles = titles
+        self.section = section
+
+    @classmethod
+    def from_row(cls, section, key, row):
+        """
+        Creates a person from a row of a people section
+        :param section: Name of the section
+        :param key: Key of the row, the name of the person (Pro pages) or the row index (public pages)
+        :param row: Compact data of the row
+        :return: Person, or None if the row isn't a person
+        """
+        if isinstance(row, dict):
+            titles = tuple(value for row_key, value in row.items() if isinstance(row_key, int))
+            return cls(key if isinstance(key, str) else None, row.get("Crunchbase URL"), titles, section)
+        if isinstance(row, tuple) and len(row) > 0 and isinstance(row[0], str):
+            return cls(row[0], None, tuple(value for value in row[1:] if isinstance(value, str)), section)
+        return None
+
+    def __repr__(self):
+        return "Person(" + repr(self.name) + ", " + repr(self.section) + ")"
+
+
+class ProfileRecord:
+    """ Class that represents a parsed profile in a compact form"""
+
+    __slots__ = ("name", "url", "fields", "funding_rounds", "people", "sections")
+
+    def __init__(self, name=None, url=None, fields=None, funding_rounds=(), people=(), sections=None):
+        """
+        Initialize a profile record
+        :param name: Name of the profile
+        :param url: Crunchbase URL of the profile
+        :param fields: Dictionary of the (section, label) tuples to the values of the label/value sections (About,
+                       Highlights, ...), a label shown in two sections keeps both values
+        :param funding_rounds: Tuple of FundingRound
+        :param people: Tuple of Person
+        :param sections: Dictionary of the other sections, in their compact form
+        """
+        self.name = name
+        self.url = url
+        self.fields = fields if fields is not None else dict()
+        self.funding_rounds = funding_rounds
+        self.people = people
+        self.sections = sections if sections is not None else dict()
+
+    def field(self, label=None, section=None):
+        """
+        Gets the value of a field
+        :param label: Label of the field, e.g. 'Founded Date'
+        :param section: Name of the section of the field, None for the first section that has the label
+        :return: The value, or None if the profile doesn't have the field
+        """
+        if label is None:
+            raise TypeError("NoneType parameter: 'label'")
+        if section is not None:
+            return self.fields.get((section, label))
+        return next((value for (_, field_label), value in self.fields.items() if field_label == label), None)
+
+    def __repr__(self):
+        return "ProfileRecord(" + repr(self.name) + ", " + repr(self.url) + ")"
+
+
+def from_data(data=None):
+    """
+    Converts the parsed data of a profile to a record
+    :param data: Dictionary of the parsed profile data, as returned by Profile.get_data
+    :return: ProfileRecord
+    """
+    if data is None:
+        raise TypeError("NoneType parameter: 'data'")
+
+    name, profile_data = next(iter(data.items()))
+    record = ProfileRecord(name, profile_data.get("Crunchbase URL"))
+    funding_rounds = list()
+    people = list()
+
+    for section, section_data in profile_data.items():
+        if section == "Crunchbase URL":
+            continue
+        section = intern_key(section)
+        section_data = compact(section_data)
+
+        if section in FUNDING_SECTIONS:
+            funding_rounds.extend(funding_round for funding_round in
+                                  (FundingRound.from_row(row) for key, row in rows(section_data))
+                                  if funding_round is not None)
+        elif section in PEOPLE_SECTIONS:
+            people.extend(person for person in
+                          (Person.from_row(section, key, row) for key, row in rows(section_data))
+                          if person is not None)
+        elif len(fields(section_data)) > 0:
+            # Label/value sections are keyed by section, e.g. the 'Name' of Parent Company isn't the profile name
+            for label, value in fields(section_data):
+                record.fields[(section, label)] = value
+        else:
+            record.sections[section] = section_data
+
+    record.funding_rounds = tuple(funding_rounds)
+    record.people = tuple(people)
+    return record
+
+
+def load_records(path=None):
+    """
+    Reads the profiles of a JSON Lines file as records
+    :param path: Path of the JSON Lines file, gzip-compressed if it ends with '.gz'
+    :return: Generator of ProfileRecord
+    """
+    for data in read_jsonl(path):
+        yield from_data(data)
+
+
+def to_dataframes(records=None):
+    """
+    Exports records to pandas DataFrames, one row per profile, funding round and person
+    :param records: Iterable of ProfileRecord
+    :return: Dictionary with the 'profiles', 'funding_rounds' and 'people' DataFrames, joined on 'url' / 'profile_url',
+             the field columns are named 'section: label', e.g. 'About: Founded Date'
+    """
+    if records is None:
+        raise TypeError("NoneType parameter: 'records'")
+
+    import pandas
+
+    # Columns are built as lists, one per attribute, instead of a dictionary per row
+    profiles = {"name": list(), "url": list()}
+    funding_rounds = {"profile_url": list(), "funding_type": list(), "amount": list()}
+    funding_rounds.update((attribute, list()) for attribute in FundingRound.__slots__)
+    people = {"profile_url": list(), "section": list(), "name": list(), "url": list(), "titles": list()}
+
+    count = 0
+    for record in records:
+        profiles["name"].append(record.name)
+        profiles["url"].append(record.url)
+        for (section, label), value in record.fields.items():
+            # Fields first seen on a later profile are missing on the previous ones
+            profiles.setdefault(section + ": " + label, [None] * count).append(value)
+        count += 1
+        for column in profiles.values():
+            if len(column) < count:
+                column.append(None)
+
+        for funding_round in record.funding_rounds:
+            funding_rounds["profile_url"].append(record.url)
+            funding_rounds["funding_type"].append(funding_round.funding_type)
+            funding_rounds["amount"].append(funding_round.amount)
+            for attribute in FundingRound.__slots__:
+                funding_rounds[attribute].append(getattr(funding_round, attribute))
+
+        for person in record.people:
+            people["profile_url"].append(record.url)
+            people["section"].append(person.section)
+            people["name"].append(person.name)
+            people["url"].append(person.url)
+            people["titles"].append(", ".join(person.titles))
+
+    dataframes = {"profiles": pandas.DataFrame(profiles),
+                  "funding_rounds": pandas.DataFrame(funding_rounds),
+                  "people": pandas.DataFrame(people)}
+
+    # Few distinct values repeated on many rows are stored once
+    dataframes["funding_rounds"]["funding_type"] = dataframes["funding_rounds"]["funding_type"].astype("category")
+    dataframes["people"]["section"] = dataframes["people"]["section"].astype("category")
+    dataframes["funding_rounds"]["amount"] = dataframes["funding_rounds"]["amount"].astype("float64")
+    return dataframes
+
+
+def to_parquet(records=None, directory=None, compression="snappy"):
+    """
+    Exports records to Parquet files: profiles.parquet, funding_rounds.parquet and people.parquet (needs pyarrow)
+    :param records: Iterable of ProfileRecord
+    :param directory: Path of the directory of the files, created if it doesn't exist
+    :param compression: Parquet compression codec
+    :return: Dictionary of the table names to the paths of their files
+    """
+    if directory is None:
+        raise TypeError("NoneType parameter: 'directory'")
+
+    os.makedirs(directory, exist_ok=True)
+    paths = dict()
+    for table, dataframe in to_dataframes(records).items():
+        paths[table] = os.path.join(directory, table + ".parquet")
+        dataframe.to_parquet(paths[table], compression=compression, index=False)
+    return paths
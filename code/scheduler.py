@@ -0,0 +1,309 @@
+import heapq
+import itertools
+import threading
+import time
+from urllib.parse import urlsplit
+
+__author__ = "Abhinav Thirupathi"
+
+# Priorities of the requests, lower values are sent first
+FRESH = 0
+REFRESH = 1
+
+# Fraction of a token the bucket can be short of one token and still send a request
+TOKEN_EPSILON = 1e-9
+
+
+class SystemClock:
+    """ Class that represents the real clock the scheduler paces the requests with"""
+
+    def time(self):
+        return time.monotonic()
+
+    def wait(self, condition, timeout=None):
+        """
+        Waits until the condition is notified, or the timeout expires
+        :param condition: Locked threading.Condition
+        :param timeout: Number of seconds, None to wait for a notification only
+        :return:
+        """
+        condition.wait(timeout)
+
+
+class SimulatedClock:
+    """ Class that represents a clock that only moves when told to, so the scheduler can be tested without waiting"""
+
+    def __init__(self, start=0.0):
+        """
+        Initialize a simulated clock
+        :param start: Initial time in seconds
+        """
+        self.now = start
+        self.__lock = threading.Lock()
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        """
+        Moves the clock forward
+        :param seconds: Number of seconds
+        :return:
+        """
+        with self.__lock:
+            self.now += seconds
+
+    def wait(self, condition, timeout=None):
+        """
+        Moves the clock to the end of the timeout instead of waiting for it
+        :param condition: Locked threading.Condition
+        :param timeout: Number of seconds, None to wait for a notification from another thread
+        :return:
+        """
+        if timeout is None:
+            condition.wait()
+        else:
+            self.advance(timeout)
+
+
+class Slot:
+    """ Class that represents a context manager holding the permission to send one request"""
+
+    def __init__(self, scheduler, url, priority=FRESH):
+        """
+        Initialize a slot
+        :param scheduler: Scheduler the slot is acquired from
+        :param url: URL of the request
+        :param priority: Priority of the request, lower values are sent first
+        @attribute ok: Set inside the with block, False if the page came back empty or blocked, None for no feedback
+        """
+        self.scheduler = scheduler
+        self.url = url
+        self.priority = priority
+        self.ok = True
+
+    def __enter__(self):
+        self.scheduler.acquire(self.url, self.priority)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.scheduler.release(self.url, ok=self.ok if exc_type is None else False)
+
+
+class NullSlot:
+    """ Class that represents a slot of the disabled scheduler, requests are sent right away"""
+
+    ok = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class NullScheduler:
+    """ Class that represents a disabled scheduler, every call does nothing"""
+
+    enabled = False
+    __slot = NullSlot()
+
+    def slot(self, url, priority=FRESH):
+        return self.__slot
+
+    def acquire(self, url, priority=FRESH, cancelled=None):
+        return True
+
+    def release(self, url, ok=None):
+        pass
+
+    def report(self, url, ok):
+        pass
+
+    def wake(self):
+        pass
+
+
+# Shared disabled scheduler, the default of Crunchbase, Profile, Section and HTTPFetcher
+NULL_SCHEDULER = NullScheduler()
+
+
+def paced(scheduler, driver):
+    """
+    Gets the scheduler that paces the navigations of a driver
+    :param scheduler: Scheduler of the profile or section
+    :param driver: Selenium driver
+    :return: The scheduler, or the disabled scheduler for a static driver (replayed pages), which sends no requests
+             and whose waits for the row cards don't tell anything about the host
+    """
+    return NULL_SCHEDULER if getattr(driver, 'static', False) is True else scheduler
+
+
+class Scheduler:
+    """ Class that paces the requests of all the drivers and fetchers: token bucket rate limit, per-host concurrency
+    caps, priorities, and exponential backoff of the hosts whose pages come back empty or blocked"""
+
+    enabled = True
+
+    def __init__(self, rate=1.0, burst=1, per_host=2, min_rate=0.05, increase=0.05, backoff=2.0, max_backoff=300.0,
+                 clock=None):
+        """
+        Initialize a scheduler
+        :param rate: Maximum number of requests per second, over all the hosts
+        :param burst: Number of requests that can be sent at once after an idle period
+        :param per_host: Maximum number of requests in flight to one host
+        :param min_rate: Lowest number of requests per second the rate is cut down to after blocked pages
+        :param increase: Number of requests per second added to the rate after every good page, up to the maximum
+        :param backoff: Number of seconds a host is paused after its first blocked page, doubled for every other one
+        :param max_backoff: Maximum number of seconds a host is paused
+        :param clock: SystemClock or SimulatedClock, defaults to a SystemClock
+        @attribute rate: Current number of requests per second, halved after blocked pages and raised after good pages
+        @attribute hosts: Dictionary of the hosts to [requests in flight, failures in a row, paused until]
+        """
+        if rate <= 0 or burst < 1 or per_host < 1:
+            raise ValueError("Rate, burst and per_host must be positive")
+
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.per_host = per_host
+        self.min_rate = min(min_rate, rate)
+        self.increase = increase
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock if clock is not None else SystemClock()
+        self.hosts = dict()
+        self.__tokens = float(burst)
+        self.__updated = self.clock.time()
+        self.__waiting = list()
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+
+    def slot(self, url, priority=FRESH):
+        """
+        Creates a context manager that acquires the permission to send a request, and releases it
+        :param url: URL of the request
+        :param priority: Priority of the request, lower values are sent first
+        :return: Slot, its ok attribute can be set to False when the page comes back empty or blocked
+        """
+        return Slot(self, url, priority)
+
+    def acquire(self, url, priority=FRESH, cancelled=None):
+        """
+        Waits until a request to the URL can be sent
+        :param url: URL of the request
+        :param priority: Priority of the request, lower values are sent first
+        :param cancelled: threading.Event set when the request is given up, call wake after setting it
+        :return: True once the request can be sent, False if it was given up while waiting
+        """
+        host = urlsplit(url).netloc
+        entry = (priority, next(self.__sequence), host)
+
+        with self.__condition:
+            heapq.heappush(self.__waiting, entry)
+            try:
+                while True:
+                    if cancelled is not None and cancelled.is_set():
+                        # The requests queued behind this one may go first now
+                        self.__condition.notify_all()
+                        return False
+                    delay = self.__delay(entry)
+                    if delay == 0:
+                        break
+                    self.clock.wait(self.__condition, delay)
+            finally:
+                self.__waiting.remove(entry)
+                heapq.heapify(self.__waiting)
+
+            self.__tokens -= 1
+            self.__host(host)[0] += 1
+            self.__condition.notify_all()
+        return True
+
+    def release(self, url, ok=None):
+        """
+        Gives back the permission acquired for a request
+        :param url: URL of the request
+        :param ok: False if the page came back empty or blocked, True if it was good, None for no feedback
+        :return:
+        """
+        with self.__condition:
+            state = self.__host(urlsplit(url).netloc)
+            state[0] = max(0, state[0] - 1)
+            if ok is not None:
+                self.__report(state, ok)
+            self.__condition.notify_all()
+
+    def report(self, url, ok):
+        """
+        Adapts the pace to a page, without releasing a request
+        :param url: URL of the page
+        :param ok: False if the page came back empty or blocked, else True
+        :return:
+        """
+        with self.__condition:
+            self.__report(self.__host(urlsplit(url).netloc), ok)
+            self.__condition.notify_all()
+
+    def wake(self):
+        """
+        Wakes up the waiting requests, so the requests given up stop waiting
+        :return:
+        """
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def paused(self, url):
+        """
+        Gets the number of seconds before the host of the URL can be sent requests again
+        :param url: URL of the host
+        :return: Number of seconds, 0 if the host isn't paused
+        """
+        with self.__condition:
+            return max(0.0, self.__host(urlsplit(url).netloc)[2] - self.clock.time())
+
+    def __host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = [0, 0, 0.0]
+        return state
+
+    def __report(self, state, ok):
+        """
+        Pauses the host and halves the rate after a blocked page, or raises the rate after a good page
+        """
+        if ok:
+            state[1] = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+        else:
+            state[1] += 1
+            state[2] = self.clock.time() + min(self.max_backoff, self.backoff * 2 ** (state[1] - 1))
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def __delay(self, entry):
+        """
+        Gets how long the request of the entry must wait
+        :param entry: (priority, sequence, host) tuple of the request
+        :return: 0 if it can be sent now, a number of seconds, or None to wait for another request to finish
+        """
+        now = self.clock.time()
+        self.__tokens = min(float(self.burst), self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+        # Requests with a higher priority (or waiting longer) go first, unless their host is busy or paused
+        for other in sorted(self.__waiting):
+            if other == entry:
+                break
+            state = self.__host(other[2])
+            if state[0] < self.per_host and state[2] <= now:
+                return None
+
+        state = self.__host(entry[2])
+        if state[0] >= self.per_host:
+            return None
+        if state[2] > now:
+            return state[2] - now
+        # Rounding can leave the bucket a hair under one token after its wait, too little time for a clock to move
+        if self.__tokens < 1 - TOKEN_EPSILON:
+            return (1 - self.__tokens) / self.rate
+        return 0
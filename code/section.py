@@ -1,9 +1,8 @@
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import ElementClickInterceptedException
-import time
-from bs4 import BeautifulSoup
+from wait import Wait, clickable, selected
+from markup import make_soup, snapshot, ROW_CARDS, SECTION_CARDS
+from metrics import NULL_METRICS, navigate, page_source, byte_size
+from windows import enter_window, close_window
+from scheduler import NULL_SCHEDULER, FRESH, paced
 
 __author__ = "Abhinav Thirupathi"
 
@@ -11,12 +10,36 @@ __author__ = "Abhinav Thirupathi"
 class Section:
     """ Class that represents a 'Section' in a Crunchbase profile page"""
 
-    def __init__(self, name=None):
+    # Card parsers keyed by the tag name of the card, in the order parse_section dispatches them
+    card_parsers = dict()
+
+    # Card types after which parse_section returns on a Pro page
+    pro_final_cards = set()
+
+    def __init__(self, name=None, wait=None, parser=None, restrict=True, metrics=NULL_METRICS, windows=None,
+                 scheduler=NULL_SCHEDULER, priority=FRESH, cards=None):
         """
         Initialize a section
         :param name: Section name
+        :param wait: Wait engine used after clicks and navigations, defaults to a new Wait
+        :param parser: BeautifulSoup parser, defaults to 'html.parser'
+        :param restrict: If True, only the row-card / section-card subtrees of the updated pages are parsed
+        :param metrics: Metrics the card parsers, navigations and page parsing are recorded in
+        :param windows: Dictionary of the more-results links already opened in other windows to their window handles
+        :param scheduler: Scheduler that paces the navigations to the more-results pages
+        :param priority: Priority of the navigations in the scheduler
+        :param cards: Card types (tag names) to parse, None for all the registered card types; leaving out 'tabs-card'
+                      or 'list-card-more-results' skips their clicks and navigations
         """
         self.name = name
+        self.wait = wait if wait is not None else Wait()
+        self.parser = parser
+        self.restrict = restrict
+        self.metrics = metrics
+        self.windows = windows if windows is not None else dict()
+        self.scheduler = scheduler
+        self.priority = priority
+        self.cards = cards
 
     def parse_big_values_card(self, big_values_card_soup=None):
         """
@@ -258,19 +281,40 @@ class Section:
             mat_tabs = tabs_card_soup.find("div", {"class": "mat-tab-labels"})
             mat_tabs_labels = mat_tabs.find_all("div", {"role": "tab"})
 
+            # Replayed pages can't be clicked, the content of every tab was stored with the page when it was recorded
+            if getattr(driver, 'replay', False) is True:
+                for mat_tab_label in mat_tabs_labels:
+                    label = mat_tab_label.text.strip()
+                    temp_tabs_card = make_soup(driver.stored(self.tab_url(driver.current_url, index, label)),
+                                               self.parser, metrics=self.metrics).find("tabs-card")
+                    card_output[label] = self.parse_section(section_soup=temp_tabs_card.find("section-card"),
+                                                            driver=driver, index=index, ignore=True)
+                return card_output
+
+            # Only the Pro pages click, selenium isn't loaded to parse HTML
+            from selenium.common.exceptions import ElementClickInterceptedException
+
             # Iterates through the tabs in the section
             for mat_tab_label in mat_tabs_labels:
                 mat_tab_label_xpath = '//*[@id="' + mat_tab_label['id'] + '"]'
                 try:
-                    #  Clicks on the tab in the section
-                    WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, mat_tab_label_xpath))).click()
-                    time.sleep(2)
+                    #  Clicks on the tab in the section, and waits for its content to be swapped in
+                    tab_element = self.wait.until(driver, clickable(mat_tab_label_xpath), timeout=5, label="tab-clickable")
+                    if not tab_element:
+                        continue
+                    tab_element.click()
+                    self.wait.until(driver, selected(mat_tab_label_xpath), timeout=5, label="tab-selected")
+                    self.wait.settled(driver, timeout=5)
 
                     # Extracts the updated information from the section
-                    temp_row_cards = BeautifulSoup(driver.page_source, 'html.parser').find_all("row-card")
-                    temp_tabs_card = temp_row_cards[index].find("tabs-card")
+                    temp_tabs_card = self.live_card("row-card", index, driver).find("tabs-card")
                     temp_section_card = temp_tabs_card.find("section-card")
 
+                    # Stores the tab's content in the page cache, so the tab can be replayed
+                    store = getattr(driver, 'store', None)
+                    if store is not None:
+                        store(self.tab_url(driver.current_url, index, mat_tab_label.text.strip()), str(temp_tabs_card))
+
                     # Parses the updated information from the section
                     card_output[mat_tab_label.text.strip()] = self.parse_section(section_soup=temp_section_card, driver=driver, index=index, ignore=True)
 
@@ -293,19 +337,50 @@ class Section:
         if card_more_results_soup is not None:
             # Extracts the link to the all the content and gets that page
             more_results_link = "https://www.crunchbase.com" + card_more_results_soup.a['href']
-            driver.get(more_results_link)
-            time.sleep(3)
+            handle = self.windows.get(more_results_link)
+            if handle is not None:
+                origin = driver.current_window_handle
+                enter_window(driver, handle, more_results_link)
+                self.scheduler.report(more_results_link, self.wait.elements(driver, "//section-card",
+                                                                            label="section-card"))
+            else:
+                with paced(self.scheduler, driver).slot(more_results_link, self.priority) as slot:
+                    navigate(driver, more_results_link, self.metrics)
+                    slot.ok = bool(self.wait.elements(driver, "//section-card", label="section-card"))
+            self.wait.settled(driver)
 
             # Extracts the all the content of that section and parses it
-            temp_section_card = BeautifulSoup(driver.page_source, 'html.parser').find("section-card")
+            temp_section_card = self.live_card("section-card", 0, driver)
             card_output = self.parse_section(section_soup=temp_section_card, driver=driver, ignore=True)
 
-            # Goes back to the after parsing
-            driver.back()
-            time.sleep(2)
+            # Goes back to the after parsing, closing the window of a page opened in another window
+            if handle is not None:
+                close_window(driver, self.windows.pop(more_results_link), origin)
+            else:
+                driver.back()
+                self.wait.row_cards(driver)
 
         return card_output
 
+    def live_card(self, tag, index, driver):
+        """
+        Gets the Beautiful soup object of a card of the live page, parsing only that card when the driver can run scripts
+        :param tag: Tag name of the card, 'row-card' or 'section-card'
+        :param index: Index of the card among the cards with that tag name, in document order
+        :param driver: Selenium driver
+        :return: Beautiful soup object of the card
+        """
+        # Pages a cache still has to store are read whole, so they can be replayed
+        fragment = snapshot(driver, tag, index, self.metrics) if not getattr(driver, 'recording', False) else None
+        if fragment is not None:
+            return make_soup(fragment, self.parser, metrics=self.metrics).find(tag)
+
+        # Drivers without scripts (replayed pages) only have the whole page
+        cards = make_soup(page_source(driver, self.metrics), self.parser,
+                          only=(ROW_CARDS if tag == "row-card" else SECTION_CARDS) if self.restrict else None,
+                          metrics=self.metrics).find_all(tag)
+        return cards[index]
+
     def parse_section(self, section_soup=None, driver=None, index=None, ignore=False, pro=False):
         """
         Parses the section
@@ -319,40 +394,24 @@ class Section:
         # Dictionary to store and return the parsed data of the entire section
         section_output = {}
 
-        card_types = ['tabs-card', 'list-card-more-results', 'big-values-card', 'phrase-list-card', 'fields-card',
-                      'timeline-card', 'list-card', 'image-list-card', 'hub-list-card', 'description-card',
-                      'image-with-fields-card']
+        card_types = self.card_types(self.cards)
+        if len(card_types) == 0:
+            return section_output
 
-        # Iterates through the card_types and finds if each card exists
+        # Finds every registered card in a single walk of the section, and groups the cards by type in document order
+        cards_by_type = dict()
+        for card in section_soup.find_all(card_types):
+            cards_by_type.setdefault(card.name, []).append(card)
+
+        # Iterates through the card types in registry order and parses every found card with its parser
         for card_type in card_types:
-            cards = section_soup.find_all(card_type)
-
-            # Iterates through every one of the found cards and parses the cards using the right functions
-            for card in cards:
-                parsed_data = dict()
-
-                if card_type == 'big-values-card':
-                    parsed_data = self.parse_big_values_card(card)
-                elif card_type == 'phrase-list-card':
-                    parsed_data = self.parse_phrase_list_card(card)
-                elif card_type == 'fields-card':
-                    parsed_data = self.parse_fields_card(card)
-                elif card_type == 'timeline-card':
-                    parsed_data = self.parse_timeline_card(card)
-                elif card_type == 'list-card':
-                    parsed_data = self.parse_list_card(card)
-                elif card_type == 'image-list-card':
-                    parsed_data = self.parse_image_list_card(card)
-                elif card_type == 'hub-list-card':
-                    parsed_data = self.parse_hub_list_card(card)
-                elif card_type == 'description-card':
-                    parsed_data = self.parse_description_card(card)
-                elif card_type == 'image-with-fields-card':
-                    parsed_data = self.parse_image_with_fields_card(card)
-                elif card_type == 'tabs-card' and pro is True:
-                    parsed_data = self.parse_tabs_card(card, driver, index)
-                elif card_type == 'list-card-more-results' and ignore is False and pro is True:
-                    parsed_data = self.parse_card_more_results(card, driver)
+            parser = self.card_parsers[card_type]
+            for card in cards_by_type.get(card_type, []):
+                with self.metrics.timer("card", key=card_type) as timer:
+                    # Serializing the card costs a walk of its subtree, so it is only measured when metrics are on
+                    if self.metrics.enabled:
+                        timer.size = byte_size(str(card))
+                    parsed_data = parser(self, card, driver, index, ignore, pro)
 
                 # If the parsed data exists, then it is stored in the dictionary
                 if len(parsed_data) > 0:
@@ -360,7 +419,91 @@ class Section:
                         section_output[label] = value
 
                 # Processes the 'tabs-card' and 'list-card-more-results' for Pro page and returns it
-                if pro is True and (card_type == 'tabs-card' or card_type == 'list-card-more-results'):
+                if pro is True and card_type in self.pro_final_cards:
                     return section_output
 
         return section_output
+
+    @staticmethod
+    def tab_url(url, index, label):
+        """
+        Gets the URL the content of a tab is cached at
+        :param url: URL of the page
+        :param index: Index of the section on the page
+        :param label: Label of the tab
+        :return: The URL
+        """
+        return url + "#section-" + str(index) + "-tab-" + label
+
+    @classmethod
+    def card_types(cls, cards=None):
+        """
+        Gets the registered card types parse_section dispatches, in registry order
+        :param cards: Card types to keep, None for all of them
+        :return: List of the card types
+        """
+        return [card_type for card_type in cls.card_parsers if cards is None or card_type in cards]
+
+    @classmethod
+    def interactive(cls, section_soup, cards=None):
+        """
+        Checks if parsing the section on a Pro page clicks its tabs or navigates, so the driver must be on its page
+        :param section_soup: Beautiful soup object of the HTML content of the section
+        :param cards: Card types that are parsed, None for all of them
+        :return: True if the section has a card type parse_section returns after on a Pro page, else False
+        """
+        return any(section_soup.find(card_type) is not None for card_type in cls.card_types(cards)
+                   if card_type in cls.pro_final_cards)
+
+    @classmethod
+    def more_results_link(cls, section_soup, cards=None):
+        """
+        Gets the link of the more-results page parse_section navigates to on a Pro page
+        :param section_soup: Beautiful soup object of the HTML content of the section
+        :param cards: Card types that are parsed, None for all of them
+        :return: Crunchbase URL of the more-results page, or None if the section doesn't navigate
+        """
+        # parse_section returns after the first Pro card type found in the section
+        for card_type in cls.card_types(cards):
+            if card_type in cls.pro_final_cards:
+                card = section_soup.find(card_type)
+                if card is not None:
+                    if card_type == 'list-card-more-results' and card.a is not None:
+                        return "https://www.crunchbase.com" + card.a['href']
+                    return None
+        return None
+
+    @classmethod
+    def register_card(cls, card_type=None, parser=None, pro_final=False):
+        """
+        Registers a parser for a card type, replacing the existing parser of that card type
+        :param card_type: Tag name of the card
+        :param parser: Function called as parser(section, card_soup, driver, index, ignore, pro), returns a dictionary
+        :param pro_final: True if parse_section returns after parsing this card type on a Pro page
+        :return:
+        """
+        if card_type is None or parser is None:
+            raise TypeError("NoneType parameter: 'card_type' or 'parser'")
+
+        cls.card_parsers[card_type] = parser
+        if pro_final is True:
+            cls.pro_final_cards.add(card_type)
+        else:
+            cls.pro_final_cards.discard(card_type)
+
+
+# Registers the Crunchbase cards, in the order their parsed data is merged into the section
+Section.register_card('tabs-card', lambda section, card, driver, index, ignore, pro:
+                      section.parse_tabs_card(card, driver, index) if pro is True else dict(), pro_final=True)
+Section.register_card('list-card-more-results', lambda section, card, driver, index, ignore, pro:
+                      section.parse_card_more_results(card, driver) if ignore is False and pro is True else dict(),
+                      pro_final=True)
+Section.register_card('big-values-card', lambda section, card, *_: section.parse_big_values_card(card))
+Section.register_card('phrase-list-card', lambda section, card, *_: section.parse_phrase_list_card(card))
+Section.register_card('fields-card', lambda section, card, *_: section.parse_fields_card(card))
+Section.register_card('timeline-card', lambda section, card, *_: section.parse_timeline_card(card))
+Section.register_card('list-card', lambda section, card, *_: section.parse_list_card(card))
+Section.register_card('image-list-card', lambda section, card, *_: section.parse_image_list_card(card))
+Section.register_card('hub-list-card', lambda section, card, *_: section.parse_hub_list_card(card))
+Section.register_card('description-card', lambda section, card, *_: section.parse_description_card(card))
+Section.register_card('image-with-fields-card', lambda section, card, *_: section.parse_image_with_fields_card(card))
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+
+__author__ = "Abhinav Thirupathi"
+
+# Page the cookies and storage are restored on, they belong to its origin
+ORIGIN_URL = "https://www.crunchbase.com"
+LOGIN_URL = "https://www.crunchbase.com/login"
+
+# Keys of the selenium cookie dictionaries that add_cookie accepts
+COOKIE_KEYS = ["name", "value", "path", "domain", "secure", "httpOnly", "expiry"]
+
+
+class SessionStore:
+    """ Class that represents the authenticated session of one login, restored into new drivers instead of logging in"""
+
+    def __init__(self, path=None, ttl=12 * 60 * 60, auth_cookies=None):
+        """
+        Initialize a session store
+        :param path: Path of the JSON file the session is persisted in, None to keep it in memory only
+        :param ttl: Number of seconds a session is trusted after the login, None for no limit
+        :param auth_cookies: Names of the cookies that carry the login, the session expires with the first of them
+        @attribute session: Dictionary with the 'saved' time, 'cookies', 'local_storage' and 'session_storage'
+        @attribute generation: Number of sessions saved, a driver hydrated from an older generation is stale
+        """
+        self.path = path
+        self.ttl = ttl
+        self.auth_cookies = set(auth_cookies) if auth_cookies is not None else set()
+        self.generation = 0
+        self.__session = None
+        self.__lock = threading.RLock()
+
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as session_file:
+                    self.__session = json.load(session_file)
+                self.generation = 1
+            except (OSError, ValueError):
+                self.__session = None
+
+    def save(self, driver):
+        """
+        Stores the cookies and the storage of a logged-in driver
+        :param driver: Selenium driver, logged into Crunchbase
+        :return: Generation of the stored session
+        """
+        session = {
+            "saved": time.time(),
+            "cookies": [{key: cookie[key] for key in COOKIE_KEYS if key in cookie} for cookie in driver.get_cookies()],
+            "local_storage": driver.execute_script("return Object.assign({}, window.localStorage)") or {},
+            "session_storage": driver.execute_script("return Object.assign({}, window.sessionStorage)") or {},
+        }
+
+        with self.__lock:
+            if self.path is not None:
+                # Writes the new session next to the old one and swaps them, so a crash never leaves half a file
+                temporary_path = self.path + ".tmp"
+                descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(descriptor, "w", encoding="utf-8") as session_file:
+                    json.dump(session, session_file)
+                os.replace(temporary_path, self.path)
+            self.__session = session
+            self.generation += 1
+            return self.generation
+
+    def expired(self, now=None):
+        """
+        Checks if there is no usable session, because none was saved or it is too old
+        :param now: Current time, defaults to time.time()
+        :return: True if a login is needed, else False
+        """
+        now = now if now is not None else time.time()
+        with self.__lock:
+            session = self.__session
+        if session is None:
+            return True
+        if self.ttl is not None and now - session["saved"] > self.ttl:
+            return True
+        for cookie in session["cookies"]:
+            if cookie["name"] in self.auth_cookies and cookie.get("expiry") is not None and cookie["expiry"] <= now:
+                return True
+        return False
+
+    def hydrate(self, driver):
+        """
+        Restores the stored cookies and storage into a driver, so it is logged in without the login form
+        :param driver: Selenium driver
+        :return: Generation of the restored session, or None if there is no usable session
+        """
+        with self.__lock:
+            if self.expired():
+                return None
+            session = self.__session
+            generation = self.generation
+
+        # Cookies and storage can only be set on a page of their origin
+        driver.get(ORIGIN_URL)
+        driver.delete_all_cookies()
+        for cookie in session["cookies"]:
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                # Skips the cookies of other domains (trackers), the login cookies are on Crunchbase's domain
+                pass
+        for storage, items in [("localStorage", session["local_storage"]),
+                               ("sessionStorage", session["session_storage"])]:
+            if len(items) > 0:
+                driver.execute_script("var items = arguments[0]; for (var key in items) {"
+                                      "window." + storage + ".setItem(key, items[key]); }", items)
+        return generation
+
+    def refresh(self, driver, generation, login):
+        """
+        Restores a fresh session into a driver whose session expired, logging in again only once for all the drivers
+        :param driver: Selenium driver with the expired session
+        :param generation: Generation of the session the driver was hydrated from
+        :param login: Function that logs the driver in with the login form, called only if no newer session exists
+        :return: Generation of the session the driver now has
+        """
+        with self.__lock:
+            # Another driver already logged in again after this one was hydrated
+            if self.generation > (generation or 0) and not self.expired():
+                return self.hydrate(driver)
+            login(driver)
+            return self.save(driver)
+
+    def clear(self):
+        """
+        Forgets the stored session, and deletes its file
+        :return:
+        """
+        with self.__lock:
+            self.__session = None
+            self.generation += 1
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def logged_out(driver):
+    """
+    Checks if Crunchbase sent the driver back to the login page, meaning its session expired
+    :param driver: Selenium driver
+    :return: True if the driver isn't logged in anymore, else False
+    """
+    current_url = getattr(driver, "current_url", None)
+    return current_url is not None and current_url.startswith(LOGIN_URL)
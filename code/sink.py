@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+import threading
+
+__author__ = "Abhinav Thirupathi"
+
+
+class JSONLWriter:
+    """ Class that appends parsed profiles to a JSON Lines file, one profile per line"""
+
+    def __init__(self, path=None, batch_size=100, fsync=False):
+        """
+        Initialize a JSON Lines writer, the file is opened in append mode
+        :param path: Path of the JSON Lines file
+        :param batch_size: Number of profiles buffered before they are written to the file
+        :param fsync: If True, every flush is synced to disk
+        @attribute count: Number of profiles written
+        @attribute buffer: Serialized profiles waiting to be written
+        """
+        if path is None:
+            raise TypeError("NoneType parameter: 'path'")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.count = 0
+        self.__buffer = list()
+        self.__lock = threading.Lock()
+        self.__file = self.open(path)
+
+    def open(self, path):
+        """
+        Opens the file to append to
+        :param path: Path of the file
+        :return: The file object
+        """
+        return open(path, 'a', encoding='utf-8', newline='')
+
+    def write(self, data):
+        """
+        Appends a parsed profile
+        :param data: Dictionary of the parsed profile data
+        :return:
+        """
+        if data is None:
+            return
+
+        line = json.dumps(data, ensure_ascii=False) + "\n"
+        with self.__lock:
+            self.__buffer.append(line)
+            self.count += 1
+            if len(self.__buffer) >= self.batch_size:
+                self.__flush()
+
+    def __flush(self):
+        """
+        Writes the buffered profiles to the file, the lock must be held
+        :return:
+        """
+        if len(self.__buffer) > 0:
+            self.__file.write("".join(self.__buffer))
+            self.__buffer = list()
+        self.__file.flush()
+        if self.fsync:
+            os.fsync(self.__file.fileno())
+
+    def flush(self):
+        """
+        Writes the buffered profiles to the file
+        :return:
+        """
+        with self.__lock:
+            self.__flush()
+
+    def close(self):
+        """
+        Writes the buffered profiles and closes the file
+        :return:
+        """
+        with self.__lock:
+            if not self.__file.closed:
+                self.__flush()
+                self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class GzipJSONLWriter(JSONLWriter):
+    """ Class that appends parsed profiles to a gzip-compressed JSON Lines file, one profile per line"""
+
+    def __init__(self, path=None, batch_size=100, fsync=False, level=6):
+        """
+        Initialize a gzip JSON Lines writer, every open appends a new gzip member to the file
+        :param path: Path of the gzip JSON Lines file
+        :param batch_size: Number of profiles buffered before they are written to the file
+        :param fsync: If True, every flush is synced to disk
+        :param level: Gzip compression level
+        """
+        self.level = level
+        JSONLWriter.__init__(self, path=path, batch_size=batch_size, fsync=fsync)
+
+    def open(self, path):
+        """
+        Opens the file to append to
+        :param path: Path of the file
+        :return: The file object
+        """
+        return gzip.open(path, 'at', encoding='utf-8', newline='', compresslevel=self.level)
+
+
+def read_jsonl(path=None):
+    """
+    Reads the profiles of a JSON Lines file, gzip-compressed if the path ends with '.gz'
+    :param path: Path of the JSON Lines file
+    :return: Generator of the dictionaries of the parsed profiles
+    """
+    if path is None:
+        raise TypeError("NoneType parameter: 'path'")
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as jsonl_file:
+        for line in jsonl_file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,312 @@
+import pickle
+import re
+import sqlite3
+import threading
+import time
+
+from frontier import normalize_url
+from records import FUNDING_SECTIONS, FundingRound, fields, parse_amount
+
+__author__ = "Abhinav Thirupathi"
+
+# Values of the label/value sections that are numbers, e.g. '4', '$152.5M', 'CA$3M' or '€1,200', and not dates
+NUMBER_PATTERN = re.compile(r"(?:[A-Z]{0,3}[^\w\s,.])?\s?[\d,]+(?:\.\d+)?\s?[KMB]?")
+
+# Largest number of parameters of a query, SQLite allows 999 on old versions
+MAX_PARAMETERS = 900
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS profiles (id INTEGER PRIMARY KEY, url TEXT UNIQUE, name TEXT, data BLOB, "
+    "updated REAL)",
+    "CREATE INDEX IF NOT EXISTS profiles_name ON profiles (name COLLATE NOCASE)",
+    "CREATE TABLE IF NOT EXISTS sections (profile_id INTEGER, section TEXT, PRIMARY KEY (profile_id, section))",
+    "CREATE INDEX IF NOT EXISTS sections_section ON sections (section, profile_id)",
+    "CREATE TABLE IF NOT EXISTS fields (profile_id INTEGER, section TEXT, label TEXT, value TEXT, number REAL)",
+    "CREATE INDEX IF NOT EXISTS fields_profile ON fields (profile_id)",
+    "CREATE INDEX IF NOT EXISTS fields_number ON fields (label, number)",
+    "CREATE INDEX IF NOT EXISTS fields_value ON fields (label, value)",
+    "CREATE TABLE IF NOT EXISTS funding_rounds (profile_id INTEGER, funding_type TEXT, amount REAL, "
+    "announced_date TEXT, transaction_name TEXT, money_raised TEXT, lead_investors TEXT, number_of_investors TEXT)",
+    "CREATE INDEX IF NOT EXISTS funding_rounds_profile ON funding_rounds (profile_id)",
+    "CREATE INDEX IF NOT EXISTS funding_rounds_type ON funding_rounds (funding_type, amount)",
+]
+
+
+class ProfileStore:
+    """ Class that represents a local store of parsed profiles, indexed by URL, name, section and label/value fields"""
+
+    def __init__(self, path=None, batch_size=1000):
+        """
+        Initialize a profile store in an SQLite database
+        :param path: Path of the database, created if it doesn't exist
+        :param batch_size: Number of profiles buffered by write before they are inserted in one transaction
+        @attribute connection: SQLite connection to the store
+        @attribute buffer: Profiles written and not inserted yet
+        """
+        if path is None:
+            raise TypeError("NoneType parameter: 'path'")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.__buffer = list()
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self.__connection.execute(statement)
+        self.__connection.commit()
+
+    def add(self, data=None):
+        """
+        Stores a parsed profile, replacing the stored profile with the same URL
+        :param data: Dictionary of the parsed profile data, as returned by Profile.get_data
+        :return:
+        """
+        if data is None:
+            raise TypeError("NoneType parameter: 'data'")
+        self.add_many([data])
+
+    def add_many(self, profiles=None):
+        """
+        Stores parsed profiles, batch_size profiles per transaction
+        :param profiles: Iterable of the dictionaries of the parsed profiles
+        :return: Number of profiles stored
+        """
+        if profiles is None:
+            raise TypeError("NoneType parameter: 'profiles'")
+
+        count = 0
+        batch = list()
+        for data in profiles:
+            if data is not None:
+                batch.append(data)
+            if len(batch) >= self.batch_size:
+                count += self.__insert(batch)
+                batch = list()
+        if len(batch) > 0:
+            count += self.__insert(batch)
+        return count
+
+    def __insert(self, batch):
+        """
+        Stores a batch of profiles in one transaction
+        :param batch: List of the dictionaries of the parsed profiles
+        :return: Number of profiles stored
+        """
+        # A profile written twice in the batch keeps its last data
+        profiles = dict()
+        for data in batch:
+            name, profile_data = next(iter(data.items()))
+            profiles[normalize_url(profile_data["Crunchbase URL"])] = (name, profile_data, data)
+
+        now = time.time()
+        with self.__lock:
+            with self.__connection:
+                # Updates the profiles in place, so their ids (and the rows keyed by them) stay valid
+                self.__connection.executemany(
+                    "INSERT INTO profiles (url, name, data, updated) VALUES (?, ?, ?, ?) ON CONFLICT (url) DO UPDATE "
+                    "SET name = excluded.name, data = excluded.data, updated = excluded.updated",
+                    [(url, name, pickle.dumps(data), now) for url, (name, _, data) in profiles.items()])
+                ids = self.__ids(list(profiles))
+
+                for table in ["sections", "fields", "funding_rounds"]:
+                    self.__connection.executemany("DELETE FROM " + table + " WHERE profile_id = ?",
+                                                  [(profile_id,) for profile_id in ids.values()])
+
+                sections = list()
+                field_rows = list()
+                funding_rounds = list()
+                for url, (_, profile_data, _) in profiles.items():
+                    profile_id = ids[url]
+                    for section, section_data in profile_data.items():
+                        if section == "Crunchbase URL":
+                            continue
+                        sections.append((profile_id, section))
+
+                        if section in FUNDING_SECTIONS and isinstance(section_data, dict):
+                            funding_rounds.extend((profile_id, funding_round.funding_type, funding_round.amount,
+                                                   funding_round.announced_date, funding_round.transaction_name,
+                                                   funding_round.money_raised, funding_round.lead_investors,
+                                                   funding_round.number_of_investors)
+                                                  for funding_round in map(FundingRound.from_row, section_data.values())
+                                                  if funding_round is not None)
+
+                        # Label/value sections, every field keeps its section so the same label stays apart
+                        field_rows.extend((profile_id, section, label, value,
+                                           parse_amount(value) if NUMBER_PATTERN.fullmatch(value) else None)
+                                          for label, value in fields(section_data))
+
+                self.__connection.executemany("INSERT OR REPLACE INTO sections VALUES (?, ?)", sections)
+                self.__connection.executemany("INSERT INTO fields VALUES (?, ?, ?, ?, ?)", field_rows)
+                self.__connection.executemany("INSERT INTO funding_rounds VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                              funding_rounds)
+        return len(profiles)
+
+    def __ids(self, urls):
+        """
+        Gets the ids of stored profiles, the lock must be held
+        :param urls: List of normalized Crunchbase URLs
+        :return: Dictionary of the URLs to their ids
+        """
+        ids = dict()
+        for start in range(0, len(urls), MAX_PARAMETERS):
+            chunk = urls[start:start + MAX_PARAMETERS]
+            ids.update((url, profile_id) for profile_id, url in self.__connection.execute(
+                "SELECT id, url FROM profiles WHERE url IN (" + ", ".join("?" * len(chunk)) + ")", chunk))
+        return ids
+
+    def write(self, data):
+        """
+        Buffers a parsed profile, the buffer is stored every batch_size profiles, so the store can be used as a sink
+        :param data: Dictionary of the parsed profile data
+        :return:
+        """
+        if data is None:
+            return
+
+        batch = None
+        with self.__lock:
+            self.__buffer.append(data)
+            if len(self.__buffer) >= self.batch_size:
+                batch, self.__buffer = self.__buffer, list()
+        if batch is not None:
+            self.__insert(batch)
+
+    def flush(self):
+        """
+        Stores the buffered profiles
+        :return:
+        """
+        with self.__lock:
+            batch, self.__buffer = self.__buffer, list()
+        if len(batch) > 0:
+            self.__insert(batch)
+
+    def get(self, url=None):
+        """
+        Gets a stored profile
+        :param url: Crunchbase URL of the profile
+        :return: Dictionary of the parsed profile data, or None if the profile isn't stored
+        """
+        if url is None:
+            raise TypeError("NoneType parameter: 'url'")
+
+        with self.__lock:
+            row = self.__connection.execute("SELECT data FROM profiles WHERE url = ?",
+                                            (normalize_url(url),)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def __contains__(self, url):
+        with self.__lock:
+            row = self.__connection.execute("SELECT 1 FROM profiles WHERE url = ?", (normalize_url(url),)).fetchone()
+        return row is not None
+
+    def missing(self, urls=None):
+        """
+        Gets the profiles that aren't stored yet, e.g. to only scrape the new profiles
+        :param urls: Dictionary of profile names to Crunchbase URLs, or iterable of (name, url) tuples
+        :return: Generator of (name, url) tuples
+        """
+        if urls is None:
+            raise TypeError("NoneType parameter: 'urls'")
+        if isinstance(urls, dict):
+            urls = urls.items()
+
+        for name, url in urls:
+            if url not in self:
+                yield name, url
+
+    def find(self, name=None):
+        """
+        Gets the stored profiles with a name, ignoring case
+        :param name: Name of the profile
+        :return: List of the dictionaries of the parsed profiles
+        """
+        if name is None:
+            raise TypeError("NoneType parameter: 'name'")
+
+        with self.__lock:
+            rows = self.__connection.execute("SELECT data FROM profiles WHERE name = ? COLLATE NOCASE",
+                                             (name,)).fetchall()
+        return [pickle.loads(row[0]) for row in rows]
+
+    def with_section(self, section=None):
+        """
+        Gets the profiles that have a section
+        :param section: Section name
+        :return: List of (name, url) tuples
+        """
+        if section is None:
+            raise TypeError("NoneType parameter: 'section'")
+
+        with self.__lock:
+            return self.__connection.execute("SELECT profiles.name, profiles.url FROM sections JOIN profiles "
+                                             "ON profiles.id = sections.profile_id WHERE sections.section = ?",
+                                             (section,)).fetchall()
+
+    def where(self, label=None, value=None, minimum=None, maximum=None, section=None):
+        """
+        Gets the profiles with a field (a label of a label/value section) that matches, the same label can be shown in
+        several sections (e.g. the 'Name' of Parent Company), so section narrows it down
+        :param label: Label of the field, e.g. 'Total Funding Amount'
+        :param value: Value of the field as shown on Crunchbase, None for any value
+        :param minimum: Smallest number of the field (amounts and counts), None for no limit
+        :param maximum: Largest number of the field, None for no limit
+        :param section: Name of the section of the field, None for any section
+        :return: List of (name, url, value) tuples
+        """
+        if label is None:
+            raise TypeError("NoneType parameter: 'label'")
+
+        conditions = ["fields.label = ?"]
+        parameters = [label]
+        for condition, parameter in [("fields.value = ?", value), ("fields.number >= ?", minimum),
+                                     ("fields.number <= ?", maximum), ("fields.section = ?", section)]:
+            if parameter is not None:
+                conditions.append(condition)
+                parameters.append(parameter)
+
+        with self.__lock:
+            return self.__connection.execute("SELECT DISTINCT profiles.name, profiles.url, fields.value FROM fields "
+                                             "JOIN profiles ON profiles.id = fields.profile_id WHERE " +
+                                             " AND ".join(conditions), parameters).fetchall()
+
+    def funding_rounds(self, funding_type=None, minimum=None, maximum=None):
+        """
+        Gets the funding rounds that match, e.g. the Series B rounds over $50M
+        :param funding_type: Type of the rounds, e.g. 'Series B', None for any type
+        :param minimum: Smallest amount raised, None for no limit
+        :param maximum: Largest amount raised, None for no limit
+        :return: List of (name, url, funding type, amount, announced date) tuples
+        """
+        conditions = ["1"]
+        parameters = list()
+        for condition, parameter in [("funding_rounds.funding_type = ?", funding_type),
+                                     ("funding_rounds.amount >= ?", minimum), ("funding_rounds.amount <= ?", maximum)]:
+            if parameter is not None:
+                conditions.append(condition)
+                parameters.append(parameter)
+
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT profiles.name, profiles.url, funding_rounds.funding_type, funding_rounds.amount, "
+                "funding_rounds.announced_date FROM funding_rounds JOIN profiles "
+                "ON profiles.id = funding_rounds.profile_id WHERE " + " AND ".join(conditions), parameters).fetchall()
+
+    def count(self):
+        """
+        Gets the number of stored profiles
+        :return: The number of profiles
+        """
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def close(self):
+        """
+        Stores the buffered profiles and closes the store
+        :return:
+        """
+        self.flush()
+        with self.__lock:
+            self.__connection.close()
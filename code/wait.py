@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import deque
+from metrics import NULL_METRICS
+
+__author__ = "Abhinav Thirupathi"
+
+
+class Wait:
+    """ Class that waits for readiness signals on a selenium driver and records how long each wait took"""
+
+    def __init__(self, timeout=10, poll=0.1, settle=0.3, metrics=NULL_METRICS, recent=1000):
+        """
+        Initialize a wait engine
+        :param timeout: Default number of seconds before a wait gives up
+        :param poll: Number of seconds between two checks of a condition
+        :param settle: Number of seconds the DOM must stay unchanged to be considered settled
+        :param metrics: Metrics every wait is recorded in
+        :param recent: Number of the most recent waits kept in timings, the older ones are only in the summary
+        @attribute timings: Deque of (label, seconds, ready) tuples of the most recent waits
+        @attribute summary: Dictionary of the labels to [waits, seconds, timeouts], over all the waits
+        """
+        self.timeout = timeout
+        self.poll = poll
+        self.settle = settle
+        self.metrics = metrics
+        self.timings = deque(maxlen=recent)
+        self.summary = dict()
+        self.__lock = threading.Lock()
+
+    def until(self, driver, condition, timeout=None, label=None):
+        """
+        Waits until the condition is true on the driver, or the timeout expires
+        :param driver: Selenium driver
+        :param condition: Function that takes the driver and returns a truthy value when ready
+        :param timeout: Number of seconds before giving up, defaults to the engine timeout
+        :param label: Name of the wait in the recorded timings
+        :return: The truthy value returned by the condition, or False if the timeout expired
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        # Static pages (replayed or fetched without a browser) never change, so they are checked only once
+        if getattr(driver, 'static', False) is True:
+            timeout = 0
+
+        start = time.monotonic()
+        deadline = start + timeout
+        result = False
+        while True:
+            # Conditions that raise (stale or missing elements) count as not ready yet
+            try:
+                result = condition(driver)
+            except Exception:
+                result = False
+            if result or time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll)
+
+        label = label or getattr(condition, '__name__', 'condition')
+        seconds = time.monotonic() - start
+        with self.__lock:
+            self.timings.append((label, seconds, bool(result)))
+            aggregate = self.summary.get(label)
+            if aggregate is None:
+                aggregate = self.summary[label] = [0, 0.0, 0]
+            aggregate[0] += 1
+            aggregate[1] += seconds
+            aggregate[2] += 0 if result else 1
+        self.metrics.record("wait", seconds, key=label, ready=bool(result))
+        return result
+
+    def elements(self, driver, xpath, timeout=None, label=None):
+        """
+        Waits until at least one element matches the xpath
+        :param driver: Selenium driver
+        :param xpath: XPath of the elements
+        :param timeout: Number of seconds before giving up
+        :param label: Name of the wait in the recorded timings
+        :return: List of the matching elements, or False if the timeout expired
+        """
+        return self.until(driver, present(xpath), timeout=timeout, label=label or xpath)
+
+    def row_cards(self, driver, timeout=None):
+        """
+        Waits until the sections (row-cards) of a profile page are present and the DOM settled
+        :param driver: Selenium driver
+        :param timeout: Number of seconds before giving up
+        :return: True if the page is ready, else False
+        """
+        ready = self.elements(driver, "//row-card", timeout=timeout, label="row-card")
+        return bool(ready) and bool(self.settled(driver, timeout=timeout))
+
+    def settled(self, driver, timeout=None):
+        """
+        Waits until the number of elements on the page stops changing
+        :param driver: Selenium driver
+        :param timeout: Number of seconds before giving up
+        :return: True if the DOM settled, else False
+        """
+        return self.until(driver, dom_settled(self.settle), timeout=timeout, label="dom-settled")
+
+    def total(self):
+        """
+        Gets the total number of seconds spent waiting
+        :return: Sum of the durations of all the waits
+        """
+        with self.__lock:
+            return sum(aggregate[1] for aggregate in self.summary.values())
+
+
+def present(xpath):
+    """
+    Condition that is ready when at least one element matches the xpath
+    :param xpath: XPath of the elements
+    :return: Function that takes the driver and returns the list of matching elements
+    """
+    def condition(driver):
+        return driver.find_elements_by_xpath(xpath)
+    condition.__name__ = xpath
+    return condition
+
+
+def clickable(xpath):
+    """
+    Condition that is ready when the element at the xpath is visible and enabled
+    :param xpath: XPath of the element
+    :return: Function that takes the driver and returns the element when it can be clicked
+    """
+    def condition(driver):
+        element = driver.find_element_by_xpath(xpath)
+        return element if element.is_displayed() and element.is_enabled() else False
+    condition.__name__ = "clickable"
+    return condition
+
+
+def selected(xpath):
+    """
+    Condition that is ready when the tab at the xpath is selected, i.e. its content is swapped in
+    :param xpath: XPath of the tab
+    :return: Function that takes the driver and returns True if the tab is selected
+    """
+    def condition(driver):
+        return driver.find_element_by_xpath(xpath).get_attribute("aria-selected") == "true"
+    condition.__name__ = "selected"
+    return condition
+
+
+def url_changed(url):
+    """
+    Condition that is ready when the driver navigated away from the url
+    :param url: The URL before the navigation
+    :return: Function that takes the driver and returns True if the current URL is different
+    """
+    def condition(driver):
+        return driver.current_url != url
+    condition.__name__ = "url-changed"
+    return condition
+
+
+def dom_settled(settle):
+    """
+    Condition that is ready when the number of elements in the DOM has not changed for some time
+    :param settle: Number of seconds the DOM must stay the same
+    :return: Function that takes the driver and returns True if the DOM settled
+    """
+    state = {'size': None, 'since': None}
+
+    def condition(driver):
+        size = driver.execute_script("return document.getElementsByTagName('*').length")
+        now = time.monotonic()
+        if size != state['size']:
+            state['size'] = size
+            state['since'] = now
+            return False
+        return now - state['since'] >= settle
+    condition.__name__ = "dom-settled"
+    return condition
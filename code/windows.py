@@ -0,0 +1,62 @@
+from scheduler import NULL_SCHEDULER, FRESH
+
+__author__ = "Abhinav Thirupathi"
+
+# Script that opens a URL in a new browser window, without waiting for it to load
+OPEN_SCRIPT = "window.open(arguments[0], '_blank');"
+
+
+def open_windows(driver, urls, scheduler=NULL_SCHEDULER, priority=FRESH):
+    """
+    Opens every URL in a new window of the driver, the browser loads all of them at the same time
+    :param driver: Selenium driver, it stays on its current window
+    :param urls: List of the URLs
+    :param scheduler: Scheduler that paces the requests, the pages are reported to it once they are read
+    :param priority: Priority of the requests in the scheduler
+    :return: List of the window handles, in the order of the URLs
+    """
+    handles = list()
+    known = set(driver.window_handles)
+    for url in urls:
+        # The slot only paces the opening, the window keeps loading after it is released
+        with scheduler.slot(url, priority) as slot:
+            slot.ok = None
+            driver.execute_script(OPEN_SCRIPT, url)
+
+        # The window opened by the script is the only handle the driver didn't know
+        new_handles = [handle for handle in driver.window_handles if handle not in known]
+        if len(new_handles) != 1:
+            raise LookupError("Window not opened: '" + url + "'")
+        handles.append(new_handles[0])
+        known.add(new_handles[0])
+    return handles
+
+
+def enter_window(driver, handle, url):
+    """
+    Switches the driver to a window opened by open_windows
+    :param driver: Selenium driver
+    :param handle: Handle of the window
+    :param url: URL the window was opened with
+    :return:
+    """
+    driver.switch_to.window(handle)
+
+    # Drivers that store the fetched pages (CachedDriver) store this page like a page fetched with get()
+    loaded = getattr(driver, 'loaded', None)
+    if loaded is not None:
+        loaded(url)
+
+
+def close_window(driver, handle, back_to):
+    """
+    Closes a window opened by open_windows, and switches the driver back to another window
+    :param driver: Selenium driver
+    :param handle: Handle of the window to close
+    :param back_to: Handle of the window the driver switches to
+    :return:
+    """
+    if driver.current_window_handle != handle:
+        driver.switch_to.window(handle)
+    driver.close()
+    driver.switch_to.window(back_to)